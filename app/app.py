@@ -4,38 +4,229 @@ Flask Web应用 - 测试目标应用
 这是一个简单的电商网站，包含用户注册、登录、商品浏览、购物车等功能
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+import os
+
+# 使用gevent运行时必须在导入其他模块之前打补丁（gunicorn的gevent worker会自行处理）
+if os.getenv('USE_GEVENT') == '1':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Response, abort, render_template, request, jsonify, session, redirect, url_for, flash
+from flask.json.provider import JSONProvider
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_bcrypt import Bcrypt
+from flask_caching import Cache
+from flask_compress import Compress
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from flask_session import Session
+from sqlalchemy import event, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, object_session, raiseload
+from sqlalchemy.pool import QueuePool, StaticPool
+from werkzeug.security import check_password_hash
 from datetime import datetime
-import os
+from typing import Optional
+import hashlib
+import json
+import threading
+import msgspec
+import orjson
+import redis
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 
 # 加载环境变量
 load_dotenv()
 
+
+def get_engine_options(database_uri):
+    """
+    根据数据库类型返回连接池配置
+    服务端数据库使用较大的QueuePool；SQLite文件库允许跨线程复用连接；
+    内存库使用StaticPool，保证所有线程共享同一个连接
+    """
+    if not database_uri.startswith('sqlite'):
+        return {
+            'pool_size': 25,
+            'max_overflow': 25,
+            'pool_pre_ping': True,
+            'pool_recycle': 1800
+        }
+    
+    if database_uri in ('sqlite://', 'sqlite:///:memory:'):
+        return {
+            'poolclass': StaticPool,
+            'connect_args': {'check_same_thread': False}
+        }
+    
+    return {
+        'poolclass': QueuePool,
+        'pool_size': 5,
+        'connect_args': {'check_same_thread': False}
+    }
+
+class OrjsonProvider(JSONProvider):
+    """使用orjson的JSON序列化实现，直接支持datetime，输出bytes减少一次编码"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        # 会话序列化需要object_hook等参数，orjson不支持，交给标准库处理
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///test_app.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+# bcrypt 成本因子，开发/测试环境可调低以加快速度
+app.config['BCRYPT_ROUNDS'] = int(os.getenv('BCRYPT_ROUNDS', 10))
+app.config['BCRYPT_HANDLE_LONG_PASSWORDS'] = True
+# 配置了REDIS_URL时使用Redis缓存，否则（开发/测试）退回进程内SimpleCache
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'RedisCache' if os.getenv('REDIS_URL') else 'SimpleCache')
+app.config['CACHE_REDIS_URL'] = os.getenv('REDIS_URL')
+# 响应压缩：优先brotli，小于512字节的响应不压缩
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+# 登录/注册限流，计数存储在Redis中（未配置时使用进程内存储）
+# 开发/测试环境在.env中设置RATELIMIT_ENABLED=False关闭限流；app.testing为True时同样不限流
+app.config['RATELIMIT_STORAGE_URI'] = os.getenv('REDIS_URL', 'memory://')
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
+# 登录失败次数分别按用户名和客户端IP限制
+app.config['LOGIN_RATE_LIMIT'] = os.getenv('LOGIN_RATE_LIMIT', '5/minute;20/hour')
+app.config['LOGIN_IP_RATE_LIMIT'] = os.getenv('LOGIN_IP_RATE_LIMIT', '20/minute;100/hour')
+app.config['REGISTER_RATE_LIMIT'] = os.getenv('REGISTER_RATE_LIMIT', '3/minute')
+# 配置了REDIS_URL时会话保存在Redis中，Cookie只携带签名后的会话ID；否则沿用签名Cookie会话
+if os.getenv('REDIS_URL'):
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis.from_url(os.getenv('REDIS_URL'))
+    app.config['SESSION_USE_SIGNER'] = True
+    app.config['SESSION_PERMANENT'] = False
+
+# Flask-SQLAlchemy的会话本身是scoped_session，并在teardown_appcontext中调用remove()归还连接；
+# 关闭提交后过期，避免提交后访问属性（如to_dict()）再次触发SELECT
+db = SQLAlchemy(app, session_options={'expire_on_commit': False})
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """为新的SQLite连接开启WAL等优化设置，使读操作不被写操作阻塞"""
+    if not dbapi_connection.__class__.__module__.startswith('sqlite3'):
+        return
+    
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-64000')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+bcrypt = Bcrypt(app)
+cache = Cache(app)
+Compress(app)
+limiter = Limiter(get_remote_address, app=app, default_limits=[])
+if app.config.get('SESSION_TYPE'):
+    Session(app)
+
+# 旧版werkzeug生成的密码哈希前缀，登录成功后会迁移为bcrypt
+LEGACY_HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+
+# 密码校验结果缓存：(user_id, sha256(password)) -> bool，只缓存校验结果不缓存哈希
+_pw_cache = TTLCache(maxsize=10_000, ttl=60)
+_pw_cache_lock = threading.Lock()
+
+# 序列化结果缓存：(模型类, 主键, updated_at) -> JSON字节串，行更新后updated_at变化自动失效
+_serialized_cache = LRUCache(maxsize=10_000)
+_serialized_cache_lock = threading.Lock()
+
+
+def hash_password(password):
+    """使用bcrypt生成密码哈希"""
+    return bcrypt.generate_password_hash(password, rounds=app.config['BCRYPT_ROUNDS']).decode('utf-8')
+
+
+# API输出结构，由msgspec在C层直接编码为JSON，字段顺序与to_dict()保持一致
+class UserOut(msgspec.Struct):
+    id: int
+    username: str
+    email: str
+    is_admin: Optional[bool]
+    created_at: Optional[datetime]
+
+
+class ProductOut(msgspec.Struct):
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    stock: Optional[int]
+    category: Optional[str]
+    image_url: Optional[str]
+    created_at: Optional[datetime]
+
+
+_json_encoder = msgspec.json.Encoder()
 
-db = SQLAlchemy(app)
 
 # 数据库模型
 class User(db.Model):
     """用户模型"""
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    username = db.Column(db.String(80), unique=True, nullable=False, index=True)
+    email = db.Column(db.String(120), unique=True, nullable=False, index=True)
+    password_hash = db.Column(db.String(200), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp(), nullable=False)
+    # updated_at作为序列化缓存的版本号，需要微秒精度，保留Python端时间戳
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    cart_items = db.relationship('CartItem', back_populates='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
+        # 密码变更后清除该用户的校验缓存
+        with _pw_cache_lock:
+            for key in [key for key in _pw_cache if key[0] == self.id]:
+                _pw_cache.pop(key, None)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not password:
+            return False
+        
+        key = (self.id, hashlib.sha256(password.encode('utf-8')).digest())
+        with _pw_cache_lock:
+            cached = _pw_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if self.has_legacy_hash():
+            result = check_password_hash(self.password_hash, password)
+        else:
+            result = bcrypt.check_password_hash(self.password_hash, password)
+        
+        with _pw_cache_lock:
+            _pw_cache[key] = result
+        return result
+    
+    def has_legacy_hash(self):
+        return self.password_hash.startswith(LEGACY_HASH_PREFIXES)
     
     def to_dict(self):
         return {
@@ -43,42 +234,66 @@ class User(db.Model):
             'username': self.username,
             'email': self.email,
             'is_admin': self.is_admin,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
+    
+    def to_json(self):
+        return _json_encoder.encode(UserOut(
+            self.id, self.username, self.email, self.is_admin, self.created_at
+        ))
 
 class Product(db.Model):
     """商品模型"""
+    __table_args__ = (
+        db.Index('ix_product_name', 'name'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.Float, nullable=False)
+    # 定点小数存储价格，避免浮点累计误差；读取时仍返回float以兼容模板和JSON
+    price = db.Column(db.Numeric(10, 2, asdecimal=False), nullable=False)
     stock = db.Column(db.Integer, default=0)
-    category = db.Column(db.String(50))
+    category = db.Column(db.String(50), index=True)
     image_url = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp(), nullable=False)
+    # updated_at作为序列化缓存的版本号，需要微秒精度，保留Python端时间戳
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    cart_items = db.relationship('CartItem', back_populates='product', lazy=True)
     
     def to_dict(self):
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'price': self.price,
+            'price': float(self.price),
             'stock': self.stock,
             'category': self.category,
             'image_url': self.image_url,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
+    
+    def to_json(self):
+        return _json_encoder.encode(ProductOut(
+            self.id, self.name, self.description, float(self.price), self.stock,
+            self.category, self.image_url, self.created_at
+        ))
 
 class CartItem(db.Model):
     """购物车项目模型"""
+    __table_args__ = (
+        db.Index('ix_cart_user_product', 'user_id', 'product_id', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
     quantity = db.Column(db.Integer, default=1)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, server_default=db.func.current_timestamp(), nullable=False)
     
-    user = db.relationship('User', backref=db.backref('cart_items', lazy=True))
-    product = db.relationship('Product', backref=db.backref('cart_items', lazy=True))
+    user = db.relationship('User', back_populates='cart_items')
+    product = db.relationship('Product', back_populates='cart_items')
     
     def to_dict(self):
         return {
@@ -87,14 +302,109 @@ class CartItem(db.Model):
             'product_id': self.product_id,
             'quantity': self.quantity,
             'product': self.product.to_dict() if self.product else None,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
 
+# 商品分类列表的缓存键（存放在Flask-Caching后端，多个worker进程共享）
+CATEGORIES_CACHE_KEY = 'product:categories'
+
+
+def get_categories():
+    """获取所有商品分类（缓存60秒，商品变更提交后清除）"""
+    categories = cache.get(CATEGORIES_CACHE_KEY)
+    if categories is None:
+        rows = db.session.query(Product.category).distinct().all()
+        categories = [row[0] for row in rows if row[0]]
+        cache.set(CATEGORIES_CACHE_KEY, categories, timeout=60)
+    return categories
+
+# 支持INSERT ... ON CONFLICT的数据库方言
+UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+# 商品列表API分页参数
+API_PRODUCTS_PER_PAGE = 20
+API_PRODUCTS_MAX_PER_PAGE = 100
+
+
+@cache.memoize(timeout=60)
+def get_featured_products():
+    """获取首页推荐商品（缓存60秒）"""
+    return Product.query.limit(6).all()
+
+
+@cache.memoize(timeout=300)
+def get_product(product_id):
+    """按ID获取商品（缓存300秒，商品不存在时不缓存）"""
+    return db.session.get(Product, product_id)
+
+
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_update')
+@event.listens_for(Product, 'after_delete')
+def _record_product_change(mapper, connection, target):
+    """
+    记录本次事务中变更的商品ID
+    flush时数据尚未提交，此时清除缓存，其他请求可能读到旧数据并重新写入缓存，因此等提交后再清除
+    """
+    object_session(target).info.setdefault('changed_product_ids', set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_product_cache(session):
+    """事务提交后清除变更商品相关的缓存"""
+    product_ids = session.info.pop('changed_product_ids', None)
+    if not product_ids:
+        return
+    cache.delete(CATEGORIES_CACHE_KEY)
+    cache.delete_memoized(get_featured_products)
+    for product_id in product_ids:
+        cache.delete_memoized(get_product, product_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_product_changes(session):
+    """事务回滚后变更没有生效，丢弃记录的商品ID"""
+    session.info.pop('changed_product_ids', None)
+
+
+def apply_safe_loads(query, *eager):
+    """
+    为查询附加预加载选项
+    调试/测试模式下额外禁止其余关系的懒加载，以便在开发阶段暴露N+1查询；
+    生产环境不启用，避免把遗漏的预加载变成500错误
+    """
+    if app.debug or app.testing:
+        return query.options(*eager, raiseload('*'))
+    return query.options(*eager)
+
+def serialize_rows(model, versions):
+    """
+    按 (主键, updated_at) 列表拼出JSON数组字节串
+    命中缓存的行直接复用序列化结果，未命中的行用一条IN查询批量取出后序列化并写入缓存
+    """
+    keys = [(model, row_id, updated_at) for row_id, updated_at in versions]
+    with _serialized_cache_lock:
+        chunks = {key[1]: _serialized_cache.get(key) for key in keys}
+    
+    missing = [row_id for row_id, chunk in chunks.items() if chunk is None]
+    if missing:
+        for obj in apply_safe_loads(model.query).filter(model.id.in_(missing)):
+            chunks[obj.id] = obj.to_json()
+            with _serialized_cache_lock:
+                _serialized_cache[(model, obj.id, obj.updated_at)] = chunks[obj.id]
+    
+    # 两次查询之间被删除的行直接跳过
+    return b'[' + b','.join(chunks[key[1]] for key in keys if chunks[key[1]] is not None) + b']'
+
 # 路由定义
 @app.route('/')
 def index():
     """首页"""
-    products = Product.query.limit(6).all()
+    # 只缓存商品数据，页面中包含登录状态和提示消息，不能整页缓存
+    products = get_featured_products()
     return render_template('index.html', products=products)
 
 @app.route('/products')
@@ -116,8 +426,7 @@ def products():
         page=page, per_page=12, error_out=False
     )
     
-    categories = db.session.query(Product.category).distinct().all()
-    categories = [cat[0] for cat in categories if cat[0]]
+    categories = get_categories()
     
     return render_template('products.html', 
                          products=products, 
@@ -128,10 +437,13 @@ def products():
 @app.route('/product/<int:product_id>')
 def product_detail(product_id):
     """商品详情页"""
-    product = Product.query.get_or_404(product_id)
+    product = get_product(product_id)
+    if product is None:
+        abort(404)
     return render_template('product_detail.html', product=product)
 
 @app.route('/register', methods=['GET', 'POST'])
+@limiter.limit(lambda: app.config['REGISTER_RATE_LIMIT'], methods=['POST'], exempt_when=lambda: app.testing)
 def register():
     """用户注册"""
     if request.method == 'POST':
@@ -164,7 +476,33 @@ def register():
     
     return render_template('register.html')
 
+def login_rate_limit_key():
+    """登录限流按用户名计数，未提供用户名时按客户端IP计数"""
+    return request.form.get('username') or get_remote_address()
+
+def login_failed(response):
+    """登录失败（未重定向）的响应才计入限流次数"""
+    return response.status_code != 302
+
+# 超出任一限制的请求直接返回429，不再执行密码哈希校验；只有登录失败才计入次数
+# 按IP的限制防止同一客户端批量尝试不同用户名，按用户名的限制防止分布式猜测同一账号的密码
 @app.route('/login', methods=['GET', 'POST'])
+@limiter.limit(
+    lambda: app.config['LOGIN_IP_RATE_LIMIT'],
+    key_func=get_remote_address,
+    scope='login_ip',
+    methods=['POST'],
+    deduct_when=login_failed,
+    exempt_when=lambda: app.testing
+)
+@limiter.limit(
+    lambda: app.config['LOGIN_RATE_LIMIT'],
+    key_func=login_rate_limit_key,
+    scope='login_username',
+    methods=['POST'],
+    deduct_when=login_failed,
+    exempt_when=lambda: app.testing
+)
 def login():
     """用户登录"""
     if request.method == 'POST':
@@ -174,6 +512,11 @@ def login():
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
+            # 旧版PBKDF2哈希迁移为bcrypt
+            if user.has_legacy_hash():
+                user.set_password(password)
+                db.session.commit()
+            
             session['user_id'] = user.id
             session['username'] = user.username
             session['is_admin'] = user.is_admin
@@ -198,17 +541,31 @@ def cart():
         flash('请先登录', 'warning')
         return redirect(url_for('login'))
     
-    cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
-    total = sum(item.product.price * item.quantity for item in cart_items)
+    cart_items = apply_safe_loads(CartItem.query, joinedload(CartItem.product)).filter_by(user_id=session['user_id']).all()
+    # 合计金额在数据库中聚合计算，不依赖逐行加载的商品数据
+    total = db.session.query(
+        db.func.coalesce(db.func.sum(Product.price * CartItem.quantity), 0.0)
+    ).select_from(CartItem).join(Product, Product.id == CartItem.product_id).filter(
+        CartItem.user_id == session['user_id']
+    ).scalar()
     
     return render_template('cart.html', cart_items=cart_items, total=total)
 
 # API路由
 @app.route('/api/products', methods=['GET'])
 def api_products():
-    """获取商品列表API"""
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products])
+    """获取商品列表API（分页，复用缓存的序列化结果）"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', API_PRODUCTS_PER_PAGE, type=int), 1), API_PRODUCTS_MAX_PER_PAGE)
+    
+    versions = db.session.execute(
+        db.select(Product.id, Product.updated_at).order_by(Product.id).limit(per_page).offset((page - 1) * per_page)
+    ).all()
+    # 每页最多100行，直接在内存中拼出完整的响应体，不再流式输出
+    response = Response(serialize_rows(Product, versions), mimetype='application/json')
+    # 商品列表与用户无关，允许浏览器和CDN短时间缓存
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 @app.route('/api/products/<int:product_id>', methods=['GET'])
 def api_product_detail(product_id):
@@ -222,7 +579,7 @@ def api_cart():
     if 'user_id' not in session:
         return jsonify({'error': '未登录'}), 401
     
-    cart_items = CartItem.query.filter_by(user_id=session['user_id']).all()
+    cart_items = apply_safe_loads(CartItem.query, joinedload(CartItem.product)).filter_by(user_id=session['user_id']).all()
     return jsonify([item.to_dict() for item in cart_items])
 
 @app.route('/api/cart/add', methods=['POST'])
@@ -238,7 +595,40 @@ def api_add_to_cart():
     if not product_id:
         return jsonify({'error': '商品ID不能为空'}), 400
     
-    product = Product.query.get(product_id)
+    user_id = session['user_id']
+    dialect_insert = UPSERT_DIALECTS.get(db.engine.dialect.name)
+    if dialect_insert is None:
+        return _add_to_cart_fallback(user_id, product_id, quantity)
+    
+    # 单条语句完成库存校验和购物车累加：商品存在且库存充足时才插入，
+    # 已有相同(user_id, product_id)记录时直接在数据库中累加数量，避免并发重复计数
+    rows = db.select(
+        literal(user_id), Product.id, literal(quantity)
+    ).where(Product.id == product_id, Product.stock >= quantity)
+    stmt = dialect_insert(CartItem.__table__).from_select(
+        ['user_id', 'product_id', 'quantity'], rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'product_id'],
+        set_={'quantity': CartItem.__table__.c.quantity + stmt.excluded.quantity}
+    )
+    
+    if db.session.execute(stmt).rowcount == 0:
+        db.session.rollback()
+        if db.session.get(Product, product_id) is None:
+            return jsonify({'error': '商品不存在'}), 404
+        return jsonify({'error': '库存不足'}), 400
+    
+    db.session.commit()
+    cart_item = CartItem.query.options(joinedload(CartItem.product)).filter_by(
+        user_id=user_id,
+        product_id=product_id
+    ).one()
+    return jsonify({'message': '添加成功', 'cart_item': cart_item.to_dict()})
+
+def _add_to_cart_fallback(user_id, product_id, quantity):
+    """不支持ON CONFLICT的数据库上按原有的先查询后修改方式添加购物车"""
+    product = db.session.get(Product, product_id)
     if not product:
         return jsonify({'error': '商品不存在'}), 404
     
@@ -248,7 +638,7 @@ def api_add_to_cart():
     
     # 检查购物车中是否已有该商品
     cart_item = CartItem.query.filter_by(
-        user_id=session['user_id'], 
+        user_id=user_id, 
         product_id=product_id
     ).first()
     
@@ -256,7 +646,7 @@ def api_add_to_cart():
         cart_item.quantity += quantity
     else:
         cart_item = CartItem(
-            user_id=session['user_id'],
+            user_id=user_id,
             product_id=product_id,
             quantity=quantity
         )
@@ -271,15 +661,15 @@ def api_users():
     if 'user_id' not in session or not session.get('is_admin'):
         return jsonify({'error': '权限不足'}), 403
     
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    versions = db.session.execute(db.select(User.id, User.updated_at).order_by(User.id)).all()
+    return Response(serialize_rows(User, versions), mimetype='application/json')
 
 @app.route('/api/health', methods=['GET'])
 def api_health():
     """健康检查API"""
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
+        'timestamp': datetime.utcnow(),
         'version': '1.0.0'
     })
 
@@ -297,6 +687,35 @@ def internal_error(error):
 def init_db():
     """初始化数据库"""
     db.create_all()
+    # create_all不会修改已存在的表，为旧数据库补建新增的列和索引（购物车upsert依赖唯一索引）
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.execute(db.text(
+                        f'ALTER TABLE {preparer.format_table(table)} '
+                        f'ADD COLUMN {preparer.format_column(column)} {column.type.compile(db.engine.dialect)}'
+                    ))
+        # 旧数据库中同一用户同一商品可能有多行，建唯一索引前合并为一行（数量相加，保留最早的一行）
+        cart = CartItem.__table__
+        if 'ix_cart_user_product' not in {index['name'] for index in inspector.get_indexes(cart.name)}:
+            duplicates = conn.execute(
+                db.select(cart.c.user_id, cart.c.product_id, db.func.min(cart.c.id),
+                          db.func.sum(db.func.coalesce(cart.c.quantity, 1)))
+                .group_by(cart.c.user_id, cart.c.product_id)
+                .having(db.func.count() > 1)
+            ).all()
+            for user_id, product_id, keep_id, quantity in duplicates:
+                conn.execute(cart.update().where(cart.c.id == keep_id).values(quantity=quantity))
+                conn.execute(cart.delete().where(
+                    cart.c.user_id == user_id, cart.c.product_id == product_id, cart.c.id != keep_id
+                ))
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
     
     # 创建管理员用户
     if not User.query.filter_by(username='admin').first():
@@ -331,4 +750,5 @@ if __name__ == '__main__':
     with app.app_context():
         init_db()
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # 仅用于本地开发；生产环境请使用 gunicorn + gevent worker 运行（见 package.json 的 start:prod）
+    app.run(debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true', host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -8,18 +8,26 @@
 import os
 import sys
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash
 from faker import Faker
 import random
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, User, Product, CartItem
+from app import app, db, User, Product, CartItem, hash_password
 
 # 创建Faker实例
 fake = Faker('zh_CN')
 
+def random_datetimes(count, days):
+    """
+    批量生成过去days天内均匀分布的随机时间
+    按时间戳区间直接计算，替代逐个调用较慢的fake.date_time_between
+    """
+    end = datetime.utcnow()
+    span = timedelta(days=days).total_seconds()
+    return [end - timedelta(seconds=random.random() * span) for _ in range(count)]
+
 def init_database():
     """初始化数据库"""
     with app.app_context():
@@ -31,52 +39,59 @@ def init_database():
         print("正在创建数据库表...")
         db.create_all()
         
-        # 插入测试数据
+        # 插入测试数据（单个事务内完成）
         print("正在插入测试数据...")
-        create_test_users()
-        create_test_products()
-        create_test_cart_items()
+        with db.session.begin():
+            create_test_users()
+            create_test_products()
+            create_test_cart_items()
         
-        # 提交事务
-        db.session.commit()
         print("数据库初始化完成！")
 
 def create_test_users():
     """创建测试用户"""
     print("创建测试用户...")
     
-    # 创建管理员用户
-    admin = User(
-        username='admin',
-        email='admin@example.com',
-        password_hash=generate_password_hash('admin123'),
-        is_admin=True,
-        created_at=datetime.utcnow()
-    )
-    db.session.add(admin)
+    now = datetime.utcnow()
+    users = [
+        # 管理员用户
+        {
+            'username': 'admin',
+            'email': 'admin@example.com',
+            'password_hash': hash_password('admin123'),
+            'is_admin': True,
+            'created_at': now
+        },
+        # 普通测试用户
+        {
+            'username': 'testuser',
+            'email': 'test@example.com',
+            'password_hash': hash_password('test123'),
+            'is_admin': False,
+            'created_at': now
+        }
+    ]
+    
+    # 随机用户共用同一个密码，只需计算一次哈希
+    random_password_hash = hash_password('password123')
     
-    # 创建普通测试用户
-    test_user = User(
-        username='testuser',
-        email='test@example.com',
-        password_hash=generate_password_hash('test123'),
-        is_admin=False,
-        created_at=datetime.utcnow()
-    )
-    db.session.add(test_user)
+    # 创建更多随机用户（先批量生成随机数据，邮箱需唯一）
+    count = 20
+    usernames = [fake.user_name() for _ in range(count)]
+    emails = [fake.unique.email() for _ in range(count)]
+    created_ats = random_datetimes(count, days=365)
+    for i, (username, email, created_at) in enumerate(zip(usernames, emails, created_ats)):
+        users.append({
+            'username': username + str(i),
+            'email': email,
+            'password_hash': random_password_hash,
+            'is_admin': False,
+            'created_at': created_at
+        })
     
-    # 创建更多随机用户
-    for i in range(20):
-        user = User(
-            username=fake.user_name() + str(i),
-            email=fake.email(),
-            password_hash=generate_password_hash('password123'),
-            is_admin=False,
-            created_at=fake.date_time_between(start_date='-1y', end_date='now')
-        )
-        db.session.add(user)
+    db.session.execute(User.__table__.insert(), users)
     
-    print(f"已创建 {22} 个测试用户")
+    print(f"已创建 {len(users)} 个测试用户")
 
 def create_test_products():
     """创建测试商品"""
@@ -203,62 +218,65 @@ def create_test_products():
     # 合并所有商品
     all_products = electronics + clothing + home_goods + books
     
-    # 添加商品到数据库
-    for product_data in all_products:
-        product = Product(
-            name=product_data['name'],
-            description=product_data['description'],
-            price=product_data['price'],
-            stock=product_data['stock'],
-            category=product_data['category'],
-            image_url=product_data['image_url'],
-            created_at=fake.date_time_between(start_date='-6m', end_date='now')
-        )
-        db.session.add(product)
+    # 预置商品
+    products = [
+        dict(product_data, created_at=created_at)
+        for product_data, created_at in zip(all_products, random_datetimes(len(all_products), days=182))
+    ]
+    
+    # 生成更多随机商品（各字段一次性批量生成后再组装）
+    count = 50
+    random_categories = random.choices(categories, k=count)
+    colors = random.choices(["007bff", "28a745", "dc3545", "ffc107", "17a2b8", "6c757d"], k=count)
+    words = fake.words(nb=count * 2)
+    descriptions = fake.texts(nb_texts=count, max_nb_chars=200)
+    created_ats = random_datetimes(count, days=365)
+    for i, (category, color, description, created_at) in enumerate(
+        zip(random_categories, colors, descriptions, created_ats)
+    ):
+        products.append({
+            'name': f"{words[2 * i].title()} {words[2 * i + 1].title()} {i+1}",
+            'description': description,
+            'price': round(random.uniform(10.0, 5000.0), 2),
+            'stock': random.randint(0, 500),
+            'category': category,
+            'image_url': f'https://via.placeholder.com/300x300/{color}/ffffff?text=Product+{i+1}',
+            'created_at': created_at
+        })
     
-    # 生成更多随机商品
-    for i in range(50):
-        category = random.choice(categories)
-        product = Product(
-            name=f"{fake.word().title()} {fake.word().title()} {i+1}",
-            description=fake.text(max_nb_chars=200),
-            price=round(random.uniform(10.0, 5000.0), 2),
-            stock=random.randint(0, 500),
-            category=category,
-            image_url=f'https://via.placeholder.com/300x300/{random.choice(["007bff", "28a745", "dc3545", "ffc107", "17a2b8", "6c757d"])}/ffffff?text=Product+{i+1}',
-            created_at=fake.date_time_between(start_date='-1y', end_date='now')
-        )
-        db.session.add(product)
+    db.session.execute(Product.__table__.insert(), products)
     
-    print(f"已创建 {len(all_products) + 50} 个测试商品")
+    print(f"已创建 {len(products)} 个测试商品")
 
 def create_test_cart_items():
     """创建测试购物车项目"""
     print("创建测试购物车项目...")
     
-    # 获取所有用户和商品
-    users = User.query.all()
-    products = Product.query.all()
+    # 获取前10个用户和所有商品（只取需要的列）
+    user_ids = db.session.execute(db.select(User.id).order_by(User.id).limit(10)).scalars().all()
+    products = db.session.execute(db.select(Product.id, Product.stock)).all()
     
     # 为部分用户创建购物车项目
-    cart_items_created = 0
-    for user in users[:10]:  # 只为前10个用户创建购物车
+    cart_items = []
+    created_ats = iter(random_datetimes(len(user_ids) * 5, days=30))
+    for user_id in user_ids:
         # 随机选择1-5个商品加入购物车
         num_items = random.randint(1, 5)
         selected_products = random.sample(products, min(num_items, len(products)))
         
-        for product in selected_products:
-            if product.stock > 0:  # 只有有库存的商品才能加入购物车
-                cart_item = CartItem(
-                    user_id=user.id,
-                    product_id=product.id,
-                    quantity=random.randint(1, min(3, product.stock)),
-                    created_at=fake.date_time_between(start_date='-1m', end_date='now')
-                )
-                db.session.add(cart_item)
-                cart_items_created += 1
+        for product_id, stock in selected_products:
+            if stock > 0:  # 只有有库存的商品才能加入购物车
+                cart_items.append({
+                    'user_id': user_id,
+                    'product_id': product_id,
+                    'quantity': random.randint(1, min(3, stock)),
+                    'created_at': next(created_ats)
+                })
+    
+    if cart_items:
+        db.session.execute(CartItem.__table__.insert(), cart_items)
     
-    print(f"已创建 {cart_items_created} 个购物车项目")
+    print(f"已创建 {len(cart_items)} 个购物车项目")
 
 def print_summary():
     """打印数据库摘要信息"""
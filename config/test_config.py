@@ -145,10 +145,15 @@ class PerformanceConfig(TestConfig):
     LOCUST_SPAWN_RATE = int(os.getenv('LOCUST_SPAWN_RATE', 2))
     LOCUST_RUN_TIME = os.getenv('LOCUST_RUN_TIME', '60s')
     
-    # 性能阈值
-    RESPONSE_TIME_THRESHOLD = 2.0  # 秒
-    ERROR_RATE_THRESHOLD = 0.05    # 5%
-    THROUGHPUT_THRESHOLD = 100     # 每秒请求数
+    # 性能阈值（可通过环境变量按压测环境调整）
+    RESPONSE_TIME_THRESHOLD = float(os.getenv('RESPONSE_TIME_THRESHOLD', 2.0))  # 秒
+    ERROR_RATE_THRESHOLD = float(os.getenv('ERROR_RATE_THRESHOLD', 0.05))       # 5%
+    THROUGHPUT_THRESHOLD = int(os.getenv('THROUGHPUT_THRESHOLD', 100))          # 每秒请求数
+    
+    # 被测服务的gunicorn配置
+    WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+    WORKER_CLASS = os.getenv('WORKER_CLASS', 'gevent')
+    WORKER_CONNECTIONS = int(os.getenv('WORKER_CONNECTIONS', 1000))
 
 
 # 创建配置实例
@@ -12,11 +12,135 @@ python scripts/deploy.py --env prod --version v1.2.3
 import os
 import sys
 import json
+import hashlib
+import pickle
 import argparse
+import shlex
+import shutil
+import signal
 import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import requests
+except ImportError:  # 精简环境中没有requests时，健康检查回退到标准库urllib
+    requests = None
+
+try:
+    import orjson
+except ImportError:  # 没有orjson时使用标准库json读写配置
+    orjson = None
+
+
+def _literal(path: str) -> str:
+    """
+    shell转义路径，并转义花括号，使其可以安全地写入str.format模板
+    """
+    return shlex.quote(path).replace('{', '{{').replace('}', '}}')
+
+
+@dataclass(frozen=True)
+class EnvConfig:
+    """
+    单个环境的部署配置，加载配置文件时解析并校验一次
+    """
+    key: str
+    name: str
+    host: str
+    port: int
+    app_dir: str
+    backup_dir: str
+    python_path: str
+    requirements_file: str
+    pre_deploy_commands: tuple
+    post_deploy_commands: tuple
+    health_check_url: Optional[str]
+    rollback_enabled: bool
+    rsync_excludes: Tuple[str, ...]
+    # 以下为派生字段
+    releases_dir: str
+    manifest_file: str
+    pid_file: str
+    start_command: str
+    # 预先格式化好环境相关部分的命令模板，调用时只需format剩余的占位符
+    rsync_cmd_template: str
+    backup_cmd_template: str
+    backup_suffix: str
+    
+    REQUIRED_FIELDS = ('name', 'host', 'port', 'app_dir')
+    
+    @classmethod
+    def from_dict(cls, key: str, data: Dict, default_excludes: Tuple[str, ...],
+                  compressor: Tuple[str, str]) -> 'EnvConfig':
+        """
+        从配置字典构建环境配置，缺少必需字段或端口不是整数时抛出ValueError
+        compressor为(备份文件后缀, tar使用的压缩程序)
+        """
+        missing = [field for field in cls.REQUIRED_FIELDS if field not in data]
+        if missing:
+            raise ValueError(f"环境 {key} 配置缺少必需字段: {', '.join(missing)}")
+        try:
+            port = int(data['port'])
+        except (TypeError, ValueError):
+            raise ValueError(f"环境 {key} 的端口配置无效: {data['port']!r}")
+        
+        app_dir = data['app_dir'].rstrip('/')
+        backup_dir = data.get('backup_dir', '/var/backups')
+        python_path = data.get('python_path', 'python3')
+        backup_suffix, compress_program = compressor
+        quoted_backup_dir = _literal(backup_dir)
+        return cls(
+            key=key,
+            name=data['name'],
+            host=data['host'],
+            port=port,
+            app_dir=app_dir,
+            backup_dir=backup_dir,
+            python_path=python_path,
+            requirements_file=data.get('requirements_file', 'requirements.txt'),
+            pre_deploy_commands=tuple(data.get('pre_deploy_commands', [])),
+            post_deploy_commands=tuple(data.get('post_deploy_commands', [])),
+            health_check_url=data.get('health_check_url'),
+            rollback_enabled=data.get('rollback_enabled', True),
+            rsync_excludes=tuple(data.get('rsync_excludes', default_excludes)),
+            releases_dir=f"{app_dir}.releases",
+            manifest_file=os.path.join(app_dir, DeploymentManager.MANIFEST_NAME),
+            # PID文件放在应用目录旁边，切换发布版本后仍能找到正在运行的进程
+            pid_file=f"{app_dir}.pid",
+            start_command=(
+                f"cd {shlex.quote(app_dir)} && {{ nohup {python_path} app.py --port {port} > app.log 2>&1 & "
+                f"echo $! > {shlex.quote(app_dir + '.pid')}; }}"
+            ),
+            # 占位符: link_dest, exclude_file, src, release
+            rsync_cmd_template=(
+                "rsync -a --delete {link_dest}--exclude-from={exclude_file} "
+                f"{{src}}/ {_literal(app_dir + '.releases')}/{{release}}/"
+            ),
+            # 占位符: backup_name, parent_dir, app_name
+            # 归档内顶层目录重命名为备份名，与回滚时的解压路径保持一致；
+            # 加大tar记录块，减少读取文件和写入管道的系统调用次数
+            backup_cmd_template=(
+                f"mkdir -p {quoted_backup_dir} && "
+                f"tar -c --blocking-factor={DeploymentManager.TAR_BLOCKING_FACTOR} "
+                f"--exclude='__pycache__' --exclude='*.pyc' "
+                f"--transform='s,^{{app_name}},{{backup_name}},' "
+                f"--use-compress-program='{compress_program}' "
+                f"-f {quoted_backup_dir}/{{backup_name}}{backup_suffix} -C {{parent_dir}} {{app_name}}"
+            ),
+            backup_suffix=backup_suffix,
+        )
 
 
 class DeploymentManager:
@@ -24,11 +148,38 @@ class DeploymentManager:
     部署管理器
     """
     
+    # 健康检查轮询间隔（秒），超过列表长度后保持最后一个值
+    HEALTH_CHECK_INTERVALS = (0.1, 0.25, 0.5, 1.0)
+    # 备份时tar的记录块大小（以512字节为单位）
+    TAR_BLOCKING_FACTOR = 256
+    # 同步代码时默认排除的文件，可在环境配置的rsync_excludes中覆盖
+    # 以/开头的规则相对项目根目录匹配，其余规则匹配文件名
+    DEFAULT_RSYNC_EXCLUDES = (
+        '.git', '__pycache__', '*.pyc', '*.pyo', '.pytest_cache', '.mypy_cache',
+        'node_modules', '*.egg-info', '/deploy/logs/', '/deploy/config.json.cache.pkl'
+    )
+    # 应用目录中记录已部署源码指纹的文件
+    MANIFEST_NAME = '.deploy_manifest'
+    # 内存中保留的部署日志行数，完整日志直接写入文件
+    LOG_TAIL_LINES = 100_000
+    # 停止应用时等待进程退出的时间（秒），超时后强制结束
+    STOP_TIMEOUT = 10
+    
     def __init__(self, base_dir: str = None):
         self.base_dir = Path(base_dir) if base_dir else Path.cwd()
         self.config_file = self.base_dir / 'deploy' / 'config.json'
         self.config = self._load_config()
-        self.deployment_log = []
+        self.deployment_log = deque(maxlen=self.LOG_TAIL_LINES)
+        # 部署日志文件句柄，首次写日志时打开，save_deployment_log时关闭并重命名
+        self._log_fh = None
+        self._log_path = None
+        self._log_lock = threading.Lock()
+        # 各环境配置在启动时解析校验，配置错误直接在这里失败
+        self.envs = self._parse_environments(self.config)
+        # 部署期间复用的bash进程，未启动时每条命令单独创建shell
+        self._shell = None
+        # 本次部署前正在运行的发布版本目录，部署失败时切回
+        self._previous_release = None
     
     def _load_config(self) -> Dict:
         """
@@ -52,7 +203,7 @@ class DeploymentManager:
                         "python manage.py collectstatic --noinput"
                     ],
                     "health_check_url": "http://test.example.com:8080/health",
-                    "rollback_enabled": true
+                    "rollback_enabled": True
                 },
                 "prod": {
                     "name": "生产环境",
@@ -70,11 +221,13 @@ class DeploymentManager:
                         "python manage.py collectstatic --noinput"
                     ],
                     "health_check_url": "http://prod.example.com/health",
-                    "rollback_enabled": true
+                    "rollback_enabled": True
                 }
             },
             "deployment": {
                 "backup_retention_days": 7,
+                "keep_releases": 5,
+                "compressor": "zstd",
                 "health_check_timeout": 30,
                 "health_check_retries": 3,
                 "deployment_timeout": 300
@@ -83,19 +236,77 @@ class DeploymentManager:
         
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return self._load_cached_config()
             except Exception as e:
                 print(f"⚠️ 加载配置文件失败，使用默认配置: {e}")
                 return default_config
         else:
             # 创建默认配置文件
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
+            if orjson:
+                self.config_file.write_bytes(orjson.dumps(default_config, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.config_file, 'w', encoding='utf-8') as f:
+                    json.dump(default_config, f, indent=2, ensure_ascii=False)
             print(f"📝 已创建默认配置文件: {self.config_file}")
             return default_config
     
+    def _load_cached_config(self) -> Dict:
+        """
+        读取配置文件，解析结果缓存到同目录的pickle文件
+        缓存文件首行记录配置文件的修改时间和大小，二者未变化时直接反序列化缓存
+        """
+        stat = self.config_file.stat()
+        header = f"{stat.st_mtime_ns}:{stat.st_size}\n".encode('ascii')
+        cache_file = self.config_file.with_name(f"{self.config_file.name}.cache.pkl")
+        
+        try:
+            with open(cache_file, 'rb') as f:
+                if f.readline() == header:
+                    return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        
+        if orjson:
+            config = orjson.loads(self.config_file.read_bytes())
+        else:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        
+        try:
+            with open(cache_file, 'wb') as f:
+                f.write(header)
+                pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+        
+        return config
+    
+    def _parse_environments(self, config: Dict) -> Dict[str, EnvConfig]:
+        """
+        将配置中的所有环境解析为EnvConfig
+        """
+        compressor = self._select_compressor(config['deployment'].get('compressor', 'zstd'))
+        return {
+            key: EnvConfig.from_dict(key, data, self.DEFAULT_RSYNC_EXCLUDES, compressor)
+            for key, data in config['environments'].items()
+        }
+    
+    def _select_compressor(self, compressor: str) -> Tuple[str, str]:
+        """
+        选择备份压缩方式，返回(备份文件后缀, 压缩程序)
+        默认使用多线程zstd压缩；未安装zstd或配置为gzip时使用pigz/gzip
+        """
+        if compressor == 'zstd' and not shutil.which('zstd'):
+            self._log("未找到zstd，改用gzip压缩备份", "WARNING")
+            compressor = 'gzip'
+        
+        if compressor == 'zstd':
+            return '.tar.zst', "zstd -T0"
+        if shutil.which('pigz'):
+            return '.tar.gz', f"pigz -p {os.cpu_count() or 1} --rsyncable"
+        return '.tar.gz', "gzip"
+    
     def _log(self, message: str, level: str = "INFO"):
         """
         记录部署日志
@@ -104,52 +315,365 @@ class DeploymentManager:
         log_entry = f"[{timestamp}] [{level}] {message}"
         self.deployment_log.append(log_entry)
         print(log_entry)
+        
+        with self._log_lock:
+            if self._log_fh is None:
+                log_dir = self.base_dir / 'deploy' / 'logs'
+                log_dir.mkdir(parents=True, exist_ok=True)
+                self._log_path = log_dir / f"deploy_{os.getpid()}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log.partial"
+                self._log_fh = open(self._log_path, 'w', buffering=8192, encoding='utf-8')
+            self._log_fh.write(f"{log_entry}\n")
     
-    def _run_command(self, command: str, cwd: str = None, timeout: int = 60) -> bool:
+    def _run_command(self, command: str, cwd: str = None, timeout: int = 60, isolated: bool = False) -> bool:
         """
         执行命令
+        标准输出和标准错误合并后逐行写入部署日志，长时间运行的命令也能实时看到进度；
+        isolated为True时不使用常驻shell（并发执行的命令不能共用同一个shell）
         """
+        self._log(f"执行命令: {command}")
+        if self._shell is not None and not isolated:
+            return self._run_in_shell(command, cwd, timeout)
+        
         try:
-            self._log(f"执行命令: {command}")
-            result = subprocess.run(
+            # 单独的进程组，超时时可以连同子进程一起终止
+            process = subprocess.Popen(
                 command,
                 shell=True,
                 cwd=cwd or self.base_dir,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=timeout
+                bufsize=1,
+                start_new_session=True
             )
-            
-            if result.returncode == 0:
-                if result.stdout:
-                    self._log(f"命令输出: {result.stdout.strip()}")
-                return True
-            else:
-                self._log(f"命令失败: {result.stderr.strip()}", "ERROR")
-                return False
-        except subprocess.TimeoutExpired:
+        except Exception as e:
+            self._log(f"执行命令异常: {e}", "ERROR")
+            return False
+        
+        timed_out = threading.Event()
+        
+        def kill_on_timeout():
+            timed_out.set()
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
+        try:
+            for line in process.stdout:
+                self._log(f"命令输出: {line.rstrip()}")
+            returncode = process.wait()
+        except Exception as e:
+            self._log(f"执行命令异常: {e}", "ERROR")
+            return False
+        finally:
+            timer.cancel()
+            process.stdout.close()
+        
+        if timed_out.is_set():
             self._log(f"命令超时: {command}", "ERROR")
             return False
+        if returncode != 0:
+            self._log(f"命令失败，退出码: {returncode}", "ERROR")
+            return False
+        return True
+    
+    def _start_shell(self):
+        """
+        启动部署期间复用的bash进程，避免每条命令都重新创建shell
+        """
+        self._shell = subprocess.Popen(
+            ['bash', '-s'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            cwd=self.base_dir,
+            start_new_session=True
+        )
+    
+    def _stop_shell(self):
+        """
+        关闭常驻bash进程
+        """
+        shell, self._shell = self._shell, None
+        if shell is None:
+            return
+        try:
+            shell.stdin.close()
+            shell.wait(timeout=5)
+        except Exception:
+            try:
+                os.killpg(shell.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        finally:
+            shell.stdout.close()
+    
+    def _run_in_shell(self, command: str, cwd: str = None, timeout: int = 60) -> bool:
+        """
+        在常驻bash进程中执行命令，通过带随机标记的结束行识别命令结束和退出码
+        每条命令在子shell中执行，cd等状态不会带到后续命令，行为与单独执行一致
+        """
+        shell = self._shell
+        sentinel = f"__DEPLOY_RC_{uuid.uuid4().hex}_"
+        workdir = shlex.quote(str(cwd or self.base_dir))
+        script = f"( cd {workdir} || exit 1\n{command}\n) < /dev/null\necho \"{sentinel}$?\"\n"
+        
+        timed_out = threading.Event()
+        
+        def kill_on_timeout():
+            timed_out.set()
+            try:
+                os.killpg(shell.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
+        returncode = None
+        try:
+            shell.stdin.write(script)
+            shell.stdin.flush()
+            for line in shell.stdout:
+                output, found, code = line.rstrip('\n').partition(sentinel)
+                if output:
+                    self._log(f"命令输出: {output}")
+                if found:
+                    returncode = int(code)
+                    break
         except Exception as e:
             self._log(f"执行命令异常: {e}", "ERROR")
+        finally:
+            timer.cancel()
+        
+        if returncode is None:
+            # shell已退出（超时被终止或异常），后续命令回退为单独执行
+            self._stop_shell()
+            if timed_out.is_set():
+                self._log(f"命令超时: {command}", "ERROR")
+            else:
+                self._log("常驻shell意外退出", "ERROR")
+            return False
+        if returncode != 0:
+            self._log(f"命令失败，退出码: {returncode}", "ERROR")
+            return False
+        return True
+    
+    def _run_deploy_commands(self, commands: List, app_dir: str, label: str,
+                             stop_on_failure: bool = False) -> List[str]:
+        """
+        在应用目录中执行预部署/后部署命令，返回执行失败的命令
+        
+        字符串命令按顺序逐条执行；{"cmd": ..., "group": ...} 形式的命令按group分组，
+        同组命令并发执行，各组在首次出现的位置依次执行
+        """
+        batches = []
+        groups = {}
+        for entry in commands:
+            if isinstance(entry, str):
+                batches.append([entry])
+            elif entry.get('group') is None:
+                batches.append([entry['cmd']])
+            elif entry['group'] in groups:
+                groups[entry['group']].append(entry['cmd'])
+            else:
+                groups[entry['group']] = [entry['cmd']]
+                batches.append(groups[entry['group']])
+        
+        failed = []
+        for batch in batches:
+            for command in batch:
+                self._log(f"执行{label}: {command}")
+            
+            if len(batch) == 1:
+                results = [self._run_command(f"cd {app_dir} && {batch[0]}")]
+            else:
+                with ThreadPoolExecutor(max_workers=len(batch)) as executor:
+                    results = list(executor.map(
+                        lambda command: self._run_command(f"cd {app_dir} && {command}", isolated=True),
+                        batch
+                    ))
+            
+            failed.extend(command for command, ok in zip(batch, results) if not ok)
+            if failed and stop_on_failure:
+                break
+        
+        return failed
+    
+    @staticmethod
+    def _write_exclude_file(patterns) -> str:
+        """
+        将排除规则写入临时文件供rsync --exclude-from使用，优先放在内存文件系统/dev/shm
+        """
+        tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        with tempfile.NamedTemporaryFile('w', prefix='deploy_excl_', dir=tmp_dir,
+                                         delete=False, encoding='utf-8') as f:
+            f.write('\n'.join(patterns) + '\n')
+        return f.name
+    
+    def _tree_hash(self, excludes) -> str:
+        """
+        计算源码树指纹：按相对路径排序的 (路径, 修改时间, 大小)，跳过排除的文件
+        """
+        anchored = [pattern.strip('/') for pattern in excludes if pattern.startswith('/')]
+        names = [pattern.rstrip('/') for pattern in excludes if not pattern.startswith('/')]
+        
+        def excluded(rel_path, name):
+            return (any(fnmatch(name, pattern) for pattern in names)
+                    or any(fnmatch(rel_path, pattern) for pattern in anchored))
+        
+        digest = hashlib.blake2b(digest_size=16)
+        for root, dirs, files in os.walk(self.base_dir):
+            rel_root = os.path.relpath(root, self.base_dir)
+            prefix = '' if rel_root == '.' else f"{rel_root}/"
+            dirs[:] = sorted(d for d in dirs if not excluded(prefix + d, d))
+            for name in sorted(files):
+                if excluded(prefix + name, name):
+                    continue
+                stat = os.stat(os.path.join(root, name), follow_symlinks=False)
+                digest.update(f"{prefix}{name}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode('utf-8', 'surrogateescape'))
+        
+        return digest.hexdigest()
+    
+    def _source_unchanged(self, env: str) -> bool:
+        """
+        源码指纹与应用目录中记录的指纹一致时返回True
+        """
+        env_config = self.envs[env]
+        try:
+            manifest = Path(env_config.manifest_file).read_text(encoding='utf-8')
+            return manifest.strip() == self._tree_hash(env_config.rsync_excludes)
+        except OSError:
             return False
     
+    @staticmethod
+    def _app_running(env_config: EnvConfig) -> bool:
+        """
+        PID文件中记录的应用进程仍然存活时返回True
+        容器中的init进程可能不回收子进程，已退出的僵尸进程按未运行处理
+        """
+        try:
+            with open(env_config.pid_file, 'r', encoding='utf-8') as f:
+                pid = int(f.read().strip())
+            os.kill(pid, 0)
+        except PermissionError:
+            # 进程存在但属于其他用户
+            return True
+        except (OSError, ValueError):
+            return False
+        
+        try:
+            with open(f"/proc/{pid}/stat", 'r', encoding='utf-8') as f:
+                # 格式为 "pid (comm) state ..."，comm中可能包含空格
+                return f.read().rpartition(')')[2].split()[0] != 'Z'
+        except (OSError, IndexError):
+            # 没有/proc（如macOS）时以kill的结果为准
+            return True
+    
+    @staticmethod
+    def _list_releases(releases_dir: str) -> List[str]:
+        """
+        按修改时间从新到旧列出所有发布版本目录
+        """
+        try:
+            with os.scandir(releases_dir) as entries:
+                releases = [(entry.stat().st_mtime, entry.path) for entry in entries
+                            if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return []
+        return [path for _, path in sorted(releases, reverse=True)]
+    
+    def _current_release(self, env_config: EnvConfig) -> Optional[str]:
+        """
+        返回当前运行的发布版本目录（应用目录是指向发布版本的符号链接）
+        应用目录还是普通目录（旧的部署布局）时，先将其移入发布目录并改为符号链接
+        """
+        app_dir = env_config.app_dir
+        if os.path.islink(app_dir):
+            return os.path.realpath(app_dir)
+        if not os.path.isdir(app_dir):
+            return None
+        
+        releases_dir = env_config.releases_dir
+        os.makedirs(releases_dir, exist_ok=True)
+        legacy_dir = os.path.join(releases_dir, f"legacy_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self._log(f"将现有应用目录迁移为发布版本: {legacy_dir}")
+        os.rename(app_dir, legacy_dir)
+        os.symlink(legacy_dir, app_dir)
+        return legacy_dir
+    
+    def _switch_release(self, app_dir: str, release_dir: str) -> bool:
+        """
+        原子切换应用目录符号链接：在同目录创建临时链接后用os.replace覆盖
+        同时刷新发布目录的修改时间（rsync -a会保留源目录的时间），按时间排序即按启用顺序排序
+        """
+        tmp_link = f"{app_dir}.tmp.{os.getpid()}"
+        try:
+            os.utime(release_dir)
+            if os.path.lexists(tmp_link):
+                os.unlink(tmp_link)
+            os.symlink(release_dir, tmp_link)
+            os.replace(tmp_link, app_dir)
+        except OSError as e:
+            self._log(f"切换应用目录失败: {e}", "ERROR")
+            return False
+        
+        self._log(f"应用目录已切换到: {release_dir}")
+        return True
+    
+    def _stop_app(self, env_config: EnvConfig):
+        """
+        停止应用服务
+        按PID文件发送SIGTERM，等待进程退出，超时后发送SIGKILL
+        """
+        self._log("停止应用服务")
+        try:
+            with open(env_config.pid_file, 'r', encoding='utf-8') as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError):
+            self._log("未找到应用PID文件，跳过停止服务", "WARNING")
+            return
+        
+        try:
+            os.kill(pid, signal.SIGTERM)
+            deadline = time.monotonic() + self.STOP_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.1)
+                os.kill(pid, 0)
+            self._log(f"应用进程 {pid} 未在 {self.STOP_TIMEOUT} 秒内退出，强制结束", "WARNING")
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        except PermissionError as e:
+            self._log(f"停止应用进程失败: {e}", "WARNING")
+        
+        try:
+            os.unlink(env_config.pid_file)
+        except OSError:
+            pass
+    
+    def _rollback_after_failure(self, env: str, backup_file: Optional[str]):
+        """
+        部署失败后回滚：优先切回部署前的发布版本，没有时使用本次创建的备份
+        """
+        target = self._previous_release or backup_file
+        if target:
+            self._log("尝试回滚")
+            self.rollback(env, target)
+    
     def validate_environment(self, env: str) -> bool:
         """
         验证环境配置
         """
-        if env not in self.config['environments']:
+        # 必需字段已在加载配置时校验，这里只需确认环境存在
+        if env not in self.envs:
             self._log(f"未知环境: {env}", "ERROR")
             return False
         
-        env_config = self.config['environments'][env]
-        required_fields = ['name', 'host', 'port', 'app_dir']
-        
-        for field in required_fields:
-            if field not in env_config:
-                self._log(f"环境配置缺少必需字段: {field}", "ERROR")
-                return False
-        
         return True
     
     def create_backup(self, env: str, version: str = None) -> Optional[str]:
@@ -159,99 +683,157 @@ class DeploymentManager:
         if not version:
             version = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        env_config = self.config['environments'][env]
-        backup_dir = env_config.get('backup_dir', '/var/backups')
-        app_dir = env_config['app_dir']
+        env_config = self.envs[env]
         
         backup_name = f"backup_{env}_{version}"
-        backup_path = f"{backup_dir}/{backup_name}"
+        backup_path = f"{env_config.backup_dir}/{backup_name}"
+        archive_file = f"{backup_path}{env_config.backup_suffix}"
         
         self._log(f"创建备份: {backup_path}")
         
-        # 创建备份目录
-        if not self._run_command(f"mkdir -p {backup_dir}"):
-            return None
-        
-        # 备份应用目录
-        if not self._run_command(f"cp -r {app_dir} {backup_path}"):
-            return None
-        
-        # 压缩备份
-        if not self._run_command(f"tar -czf {backup_path}.tar.gz -C {backup_dir} {backup_name}"):
+        # 直接流式打包压缩当前发布版本目录，不再先复制一份；
+        # 创建备份目录与打包在同一个shell中完成
+        parent_dir, app_name = os.path.split(os.path.realpath(env_config.app_dir))
+        command = env_config.backup_cmd_template.format(
+            backup_name=backup_name,
+            parent_dir=shlex.quote(parent_dir),
+            app_name=app_name,
+        )
+        if not self._run_command(command, timeout=self.config['deployment'].get('deployment_timeout', 300)):
             return None
         
-        # 删除未压缩的备份目录
-        self._run_command(f"rm -rf {backup_path}")
-        
-        self._log(f"备份创建成功: {backup_path}.tar.gz")
-        return f"{backup_path}.tar.gz"
+        self._log(f"备份创建成功: {archive_file}")
+        return archive_file
     
     def cleanup_old_backups(self, env: str):
         """
         清理旧备份
         """
-        env_config = self.config['environments'][env]
-        backup_dir = env_config.get('backup_dir', '/var/backups')
+        env_config = self.envs[env]
+        backup_dir = env_config.backup_dir
         retention_days = self.config['deployment'].get('backup_retention_days', 7)
         
         self._log(f"清理 {retention_days} 天前的备份")
         
-        # 删除旧备份文件
-        command = f"find {backup_dir} -name 'backup_{env}_*.tar.gz' -mtime +{retention_days} -delete"
-        self._run_command(command)
+        # 直接遍历备份目录删除过期文件，不再为此启动find进程
+        cutoff = time.time() - retention_days * 86400
+        prefix = f"backup_{env}_"
+        try:
+            with os.scandir(backup_dir) as entries:
+                for entry in entries:
+                    if (entry.name.startswith(prefix) and '.tar.' in entry.name
+                            and entry.stat().st_mtime < cutoff):
+                        os.unlink(entry.path)
+                        self._log(f"已删除旧备份: {entry.path}")
+        except OSError as e:
+            self._log(f"清理旧备份失败: {e}", "WARNING")
+        
+        # 只保留最近的若干个发布版本，当前版本不会被删除
+        keep_releases = self.config['deployment'].get('keep_releases', 5)
+        current_release = os.path.realpath(env_config.app_dir)
+        for release_dir in self._list_releases(env_config.releases_dir)[keep_releases:]:
+            if release_dir == current_release:
+                continue
+            try:
+                shutil.rmtree(release_dir)
+                self._log(f"已删除旧发布版本: {release_dir}")
+            except OSError as e:
+                self._log(f"删除旧发布版本失败: {e}", "WARNING")
     
     def deploy_code(self, env: str, version: str = None) -> bool:
         """
         部署代码
         """
-        env_config = self.config['environments'][env]
-        app_dir = env_config['app_dir']
+        env_config = self.envs[env]
+        app_dir = env_config.app_dir
         
-        self._log(f"开始部署到 {env_config['name']}")
+        self._log(f"开始部署到 {env_config.name}")
         
-        # 停止应用服务
-        self._log("停止应用服务")
-        self._run_command("pkill -f 'python.*app.py' || true")
+        # 记录当前版本，部署失败时切回
+        self._previous_release = self._current_release(env_config)
         
-        # 更新代码
+        # 更新代码：同步到新的发布目录，未变化的文件硬链接到当前版本，不重复拷贝
         self._log("更新代码")
-        if not self._run_command(f"rsync -av --exclude='.git' --exclude='__pycache__' --exclude='*.pyc' {self.base_dir}/ {app_dir}/"):
-            return False
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        release_name = version or timestamp
+        if os.path.exists(os.path.join(env_config.releases_dir, release_name)):
+            release_name = f"{release_name}_{timestamp}"
+        release_dir = os.path.join(env_config.releases_dir, release_name)
+        link_dest = f"--link-dest={shlex.quote(self._previous_release)} " if self._previous_release else ""
+        exclude_file = self._write_exclude_file(env_config.rsync_excludes)
         
-        # 安装依赖
-        requirements_file = env_config.get('requirements_file', 'requirements.txt')
-        if Path(self.base_dir / requirements_file).exists():
-            self._log("安装依赖")
-            if not self._run_command(f"cd {app_dir} && pip install -r {requirements_file}"):
+        # 同步代码的同时下载依赖包，网络下载与文件同步重叠执行
+        requirements_file = env_config.requirements_file
+        requirements_path = self.base_dir / requirements_file
+        wheel_dir = tempfile.mkdtemp(prefix='deploy_wheels_')
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                download = None
+                if requirements_path.exists():
+                    download = executor.submit(
+                        self._run_command,
+                        f"pip download -q -d {shlex.quote(wheel_dir)} -r {shlex.quote(str(requirements_path))}",
+                        timeout=self.config['deployment'].get('deployment_timeout', 300),
+                        isolated=True,
+                    )
+                try:
+                    if not self._run_command(env_config.rsync_cmd_template.format(
+                        link_dest=link_dest,
+                        exclude_file=exclude_file,
+                        src=shlex.quote(str(self.base_dir)),
+                        release=shlex.quote(release_name),
+                    )):
+                        return False
+                finally:
+                    os.unlink(exclude_file)
+                downloaded = download.result() if download else False
+            
+            # 停止应用服务
+            self._stop_app(env_config)
+            
+            # 原子切换应用目录符号链接到新版本
+            if not self._switch_release(app_dir, release_dir):
                 return False
+            
+            # 安装依赖：优先使用已下载的包离线安装，下载失败时回退到在线安装
+            if requirements_path.exists():
+                self._log("安装依赖")
+                if downloaded:
+                    install_command = (
+                        f"cd {shlex.quote(app_dir)} && pip install --no-index "
+                        f"--find-links {shlex.quote(wheel_dir)} -r {shlex.quote(requirements_file)}"
+                    )
+                else:
+                    self._log("依赖包预下载失败，改为在线安装", "WARNING")
+                    install_command = f"cd {shlex.quote(app_dir)} && pip install -r {shlex.quote(requirements_file)}"
+                if not self._run_command(install_command):
+                    return False
+        finally:
+            shutil.rmtree(wheel_dir, ignore_errors=True)
         
         # 执行预部署命令
-        pre_commands = env_config.get('pre_deploy_commands', [])
-        for command in pre_commands:
-            self._log(f"执行预部署命令: {command}")
-            if not self._run_command(f"cd {app_dir} && {command}"):
-                return False
+        if self._run_deploy_commands(env_config.pre_deploy_commands, app_dir, "预部署命令", stop_on_failure=True):
+            return False
         
         # 启动应用服务
         self._log("启动应用服务")
-        port = env_config['port']
-        python_path = env_config.get('python_path', 'python3')
         
-        # 后台启动应用
-        start_command = f"cd {app_dir} && nohup {python_path} app.py --port {port} > app.log 2>&1 &"
-        if not self._run_command(start_command):
+        # 后台启动应用（不在常驻shell中执行，超时终止shell进程组时不会波及应用进程）
+        if not self._run_command(env_config.start_command, isolated=True):
             return False
         
         # 等待服务启动
-        import time
         time.sleep(5)
         
         # 执行后部署命令
-        post_commands = env_config.get('post_deploy_commands', [])
-        for command in post_commands:
-            self._log(f"执行后部署命令: {command}")
-            if not self._run_command(f"cd {app_dir} && {command}"):
-                self._log(f"后部署命令失败，但继续部署: {command}", "WARNING")
+        for command in self._run_deploy_commands(env_config.post_deploy_commands, app_dir, "后部署命令"):
+            self._log(f"后部署命令失败，但继续部署: {command}", "WARNING")
+        
+        # 记录本次部署的源码指纹，源码未变化时下次部署直接跳过
+        try:
+            Path(env_config.manifest_file).write_text(self._tree_hash(env_config.rsync_excludes), encoding='utf-8')
+        except OSError as e:
+            self._log(f"写入部署清单失败: {e}", "WARNING")
         
         return True
     
@@ -259,8 +841,7 @@ class DeploymentManager:
         """
         健康检查
         """
-        env_config = self.config['environments'][env]
-        health_url = env_config.get('health_check_url')
+        health_url = self.envs[env].health_check_url
         
         if not health_url:
             self._log("未配置健康检查URL，跳过健康检查", "WARNING")
@@ -271,72 +852,112 @@ class DeploymentManager:
         
         self._log(f"开始健康检查: {health_url}")
         
-        for attempt in range(retries):
-            try:
-                import requests
-                response = requests.get(health_url, timeout=timeout)
-                if response.status_code == 200:
-                    self._log("健康检查通过")
-                    return True
-                else:
-                    self._log(f"健康检查失败，状态码: {response.status_code}", "WARNING")
-            except Exception as e:
-                self._log(f"健康检查异常 (尝试 {attempt + 1}/{retries}): {e}", "WARNING")
-            
-            if attempt < retries - 1:
-                import time
-                time.sleep(5)
+        # 在总时限内以短超时快速轮询，间隔逐步拉长，服务就绪后立即返回；
+        # 复用同一个Session，连接只建立一次
+        deadline = time.monotonic() + timeout * retries
+        probe_timeout = min(2, timeout)
+        attempt = 0
+        last_error = None
+        
+        http = requests.Session() if requests else None
+        try:
+            while True:
+                attempt += 1
+                try:
+                    status_code = self._get_status_code(http, health_url, probe_timeout)
+                    if status_code == 200:
+                        self._log(f"健康检查通过 (第 {attempt} 次尝试)")
+                        return True
+                    last_error = f"状态码: {status_code}"
+                except Exception as e:
+                    last_error = str(e)
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(self.HEALTH_CHECK_INTERVALS[min(attempt, len(self.HEALTH_CHECK_INTERVALS)) - 1], remaining))
+        finally:
+            if http is not None:
+                http.close()
         
-        self._log("健康检查失败", "ERROR")
+        self._log(f"健康检查失败 (共尝试 {attempt} 次): {last_error}", "ERROR")
         return False
     
-    def rollback(self, env: str, backup_file: str) -> bool:
+    @staticmethod
+    def _get_status_code(http, url: str, timeout: float) -> int:
+        """
+        请求健康检查地址并返回状态码，未安装requests时使用urllib
+        """
+        if http is not None:
+            return http.get(url, timeout=timeout).status_code
+        
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+    
+    def rollback(self, env: str, target: str = None) -> bool:
         """
         回滚部署
+        target为发布版本目录时直接切换过去；为备份文件时先解压为新的发布版本；
+        未指定时回滚到当前版本之前的最近一个发布版本
         """
-        env_config = self.config['environments'][env]
+        env_config = self.envs[env]
         
-        if not env_config.get('rollback_enabled', True):
+        if not env_config.rollback_enabled:
             self._log("该环境未启用回滚功能", "ERROR")
             return False
         
-        app_dir = env_config['app_dir']
+        app_dir = env_config.app_dir
         
-        self._log(f"开始回滚到备份: {backup_file}")
-        
-        # 停止应用服务
-        self._log("停止应用服务")
-        self._run_command("pkill -f 'python.*app.py' || true")
-        
-        # 删除当前应用目录
-        if not self._run_command(f"rm -rf {app_dir}"):
-            return False
+        if target is None:
+            current_release = self._current_release(env_config)
+            candidates = [release for release in self._list_releases(env_config.releases_dir)
+                          if release != current_release]
+            if not candidates:
+                self._log("没有可回滚的发布版本", "ERROR")
+                return False
+            target = candidates[0]
         
-        # 解压备份
-        backup_dir = os.path.dirname(backup_file)
-        backup_name = os.path.basename(backup_file).replace('.tar.gz', '')
+        if os.path.isdir(target):
+            release_dir = target
+            self._log(f"开始回滚到发布版本: {release_dir}")
+        else:
+            self._log(f"开始回滚到备份: {target}")
+            
+            # 解压备份为新的发布版本（按扩展名区分zstd备份和旧的gzip备份），
+            # 去掉归档内的顶层目录，新旧两种归档布局都适用
+            archive_name = os.path.basename(target)
+            if archive_name.endswith('.tar.zst'):
+                backup_name = archive_name[:-len('.tar.zst')]
+                decompress = "--use-compress-program=zstd"
+            else:
+                backup_name = archive_name.replace('.tar.gz', '')
+                decompress = "-z"
+            
+            release_dir = os.path.join(env_config.releases_dir, f"restore_{backup_name}")
+            # 路径来自命令行参数，可能包含空格或shell元字符，必须转义
+            quoted_release, quoted_target = shlex.quote(release_dir), shlex.quote(target)
+            command = (
+                f"rm -rf {quoted_release} && mkdir -p {quoted_release} && "
+                f"tar {decompress} -xf {quoted_target} -C {quoted_release} --strip-components=1"
+            )
+            if not self._run_command(command, timeout=self.config['deployment'].get('deployment_timeout', 300)):
+                return False
         
-        if not self._run_command(f"cd {backup_dir} && tar -xzf {os.path.basename(backup_file)}"):
-            return False
+        # 停止服务后原子切换符号链接，应用目录始终存在
+        self._stop_app(env_config)
         
-        # 恢复应用目录
-        if not self._run_command(f"mv {backup_dir}/{backup_name} {app_dir}"):
+        if not self._switch_release(app_dir, release_dir):
             return False
         
         # 重启应用服务
         self._log("重启应用服务")
-        port = env_config['port']
-        python_path = env_config.get('python_path', 'python3')
-        
-        start_command = f"cd {app_dir} && nohup {python_path} app.py --port {port} > app.log 2>&1 &"
-        if not self._run_command(start_command):
+        if not self._run_command(env_config.start_command, isolated=True):
             return False
         
-        # 等待服务启动
-        import time
-        time.sleep(5)
-        
-        # 健康检查
+        # 健康检查（轮询等待服务启动）
         if self.health_check(env):
             self._log("回滚成功")
             return True
@@ -354,11 +975,26 @@ class DeploymentManager:
         if not self.validate_environment(env):
             return False
         
+        # 未指定版本、源码与上次部署完全一致且应用仍在正常运行时跳过备份、同步、安装和重启；
+        # 应用已停止或健康检查失败时照常部署，重新部署可以用来恢复崩溃的应用
+        if version is None and self._source_unchanged(env):
+            if not self._app_running(self.envs[env]):
+                self._log("源码未变化，但应用未在运行，继续部署", "WARNING")
+            elif not skip_health_check and not self.health_check(env):
+                self._log("源码未变化，但健康检查失败，继续部署", "WARNING")
+            else:
+                self._log("源码未变化且应用正常运行，跳过本次部署")
+                return True
+        
         backup_file = None
+        cleanup = None
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._start_shell()
         
         try:
-            # 创建备份
+            # 创建备份，同时清理旧备份（只涉及过期的备份和发布版本，与本次部署互不影响）
             if not skip_backup:
+                cleanup = executor.submit(self.cleanup_old_backups, env)
                 backup_file = self.create_backup(env, version)
                 if not backup_file:
                     self._log("创建备份失败", "ERROR")
@@ -368,10 +1004,8 @@ class DeploymentManager:
             if not self.deploy_code(env, version):
                 self._log("代码部署失败", "ERROR")
                 
-                # 如果有备份，尝试回滚
-                if backup_file and not skip_backup:
-                    self._log("尝试回滚")
-                    self.rollback(env, backup_file)
+                # 优先切回部署前的发布版本，没有时使用备份回滚
+                self._rollback_after_failure(env, backup_file)
                 
                 return False
             
@@ -380,29 +1014,30 @@ class DeploymentManager:
                 if not self.health_check(env):
                     self._log("健康检查失败", "ERROR")
                     
-                    # 如果有备份，尝试回滚
-                    if backup_file and not skip_backup:
-                        self._log("尝试回滚")
-                        self.rollback(env, backup_file)
+                    # 优先切回部署前的发布版本，没有时使用备份回滚
+                    self._rollback_after_failure(env, backup_file)
                     
                     return False
             
-            # 清理旧备份
-            if not skip_backup:
-                self.cleanup_old_backups(env)
-            
             self._log(f"部署到 {env} 成功完成")
             return True
             
         except Exception as e:
             self._log(f"部署过程中发生异常: {e}", "ERROR")
             
-            # 如果有备份，尝试回滚
-            if backup_file and not skip_backup:
-                self._log("尝试回滚")
-                self.rollback(env, backup_file)
+            # 优先切回部署前的发布版本，没有时使用备份回滚
+            self._rollback_after_failure(env, backup_file)
             
             return False
+        finally:
+            # 等待清理完成，清理失败只记录警告
+            if cleanup is not None:
+                try:
+                    cleanup.result()
+                except Exception as e:
+                    self._log(f"清理旧备份失败: {e}", "WARNING")
+            executor.shutdown()
+            self._stop_shell()
     
     def save_deployment_log(self, env: str, version: str = None):
         """
@@ -416,8 +1051,15 @@ class DeploymentManager:
         
         log_file = log_dir / f"deploy_{env}_{version}.log"
         
-        with open(log_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(self.deployment_log))
+        # 日志已在运行过程中逐行写入，这里只需关闭文件并改为正式文件名
+        with self._log_lock:
+            if self._log_fh is None:
+                log_file.touch()
+            else:
+                self._log_fh.close()
+                os.replace(self._log_path, log_file)
+                self._log_fh = None
+                self._log_path = None
         
         print(f"📄 部署日志已保存: {log_file}")
 
@@ -428,17 +1070,23 @@ def main():
     parser.add_argument('--version', '-v', help='版本号')
     parser.add_argument('--skip-backup', action='store_true', help='跳过备份')
     parser.add_argument('--skip-health-check', action='store_true', help='跳过健康检查')
-    parser.add_argument('--rollback', help='回滚到指定备份文件')
+    parser.add_argument('--rollback', nargs='?', const='previous',
+                        help='回滚到指定备份文件或发布版本目录，不指定时回滚到上一个发布版本')
     parser.add_argument('--base-dir', help='项目根目录')
     
     args = parser.parse_args()
     
-    manager = DeploymentManager(args.base_dir)
+    try:
+        manager = DeploymentManager(args.base_dir)
+    except ValueError as e:
+        print(f"❌ 部署配置无效: {e}")
+        sys.exit(1)
     
     try:
         if args.rollback:
             # 执行回滚
-            success = manager.rollback(args.env, args.rollback)
+            target = None if args.rollback == 'previous' else args.rollback
+            success = manager.rollback(args.env, target)
         else:
             # 执行部署
             success = manager.deploy(
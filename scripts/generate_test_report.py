@@ -12,201 +12,67 @@ python scripts/generate_test_report.py --output reports/summary.html
 import os
 import json
 import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
-import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional
 
+try:
+    from lxml import etree as ET
+except ImportError:  # 未安装lxml时使用标准库解析JUnit XML，接口相同
+    import xml.etree.ElementTree as ET
 
-class TestReportGenerator:
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用标准库json
+    orjson = None
+
+
+@dataclass
+class TestError:
     """
-    测试报告生成器
+    单个失败或出错的测试用例
+    使用__slots__，大量失败用例时比字典占用更少内存；orjson可直接序列化
     """
-    
-    def __init__(self, base_dir: str = None):
-        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
-        self.reports_dir = self.base_dir / 'reports'
-        self.test_results = {
-            'unit_tests': {},
-            'api_tests': {},
-            'ui_tests': {},
-            'performance_tests': {},
-            'security_tests': {}
-        }
-    
-    def collect_test_results(self):
-        """
-        收集所有测试结果
-        """
-        print("📊 收集测试结果...")
-        
-        # 收集单元测试结果
-        # 注意：当前API测试目录为空，暂时跳过
-        # self._collect_pytest_results('unit_tests', 'tests/automation/api')
-        
-        # API测试结果 - 目录为空，暂时跳过
-        # self._collect_pytest_results('api_tests', 'tests/automation/api')
-        
-        # 使用实际存在的测试目录
-        self._collect_pytest_results('ui_tests', 'tests/ui')
-        self._collect_pytest_results('database_tests', 'tests/database')
-        self._collect_pytest_results('performance_tests', 'tests/performance')
-        
-        # 收集UI测试结果
-        self._collect_pytest_results('ui_tests', 'tests/ui')
-        
-        # 收集性能测试结果
-        self._collect_performance_results()
-        
-        # 收集安全测试结果
-        self._collect_security_results()
-    
-    def _collect_pytest_results(self, test_type: str, test_dir: str):
-        """
-        收集pytest测试结果
-        """
-        # 查找JUnit XML报告
-        junit_files = list(self.reports_dir.glob(f'*{test_type}*.xml'))
-        if not junit_files:
-            junit_files = list(Path(test_dir).glob('**/junit*.xml'))
-        
-        total_tests = 0
-        passed_tests = 0
-        failed_tests = 0
-        skipped_tests = 0
-        errors = []
-        
-        for junit_file in junit_files:
-            try:
-                tree = ET.parse(junit_file)
-                root = tree.getroot()
-                
-                # 解析测试套件
-                for testsuite in root.findall('.//testsuite'):
-                    total_tests += int(testsuite.get('tests', 0))
-                    passed_tests += int(testsuite.get('tests', 0)) - int(testsuite.get('failures', 0)) - int(testsuite.get('errors', 0)) - int(testsuite.get('skipped', 0))
-                    failed_tests += int(testsuite.get('failures', 0))
-                    skipped_tests += int(testsuite.get('skipped', 0))
-                    
-                    # 收集错误信息
-                    for testcase in testsuite.findall('.//testcase'):
-                        failure = testcase.find('failure')
-                        error = testcase.find('error')
-                        if failure is not None:
-                            errors.append({
-                                'test': testcase.get('name'),
-                                'type': 'failure',
-                                'message': failure.get('message', ''),
-                                'details': failure.text or ''
-                            })
-                        elif error is not None:
-                            errors.append({
-                                'test': testcase.get('name'),
-                                'type': 'error',
-                                'message': error.get('message', ''),
-                                'details': error.text or ''
-                            })
-            except Exception as e:
-                print(f"⚠️ 解析 {junit_file} 失败: {e}")
-        
-        self.test_results[test_type] = {
-            'total': total_tests,
-            'passed': passed_tests,
-            'failed': failed_tests,
-            'skipped': skipped_tests,
-            'success_rate': (passed_tests / total_tests * 100) if total_tests > 0 else 0,
-            'errors': errors
-        }
-    
-    def _collect_performance_results(self):
-        """
-        收集性能测试结果
-        """
-        perf_dir = self.base_dir / 'tests' / 'performance' / 'reports'
-        
-        # 查找性能测试报告
-        summary_files = list(perf_dir.glob('performance_summary_*.json'))
-        
-        if summary_files:
-            latest_file = max(summary_files, key=lambda f: f.stat().st_mtime)
-            try:
-                with open(latest_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.test_results['performance_tests'] = data
-            except Exception as e:
-                print(f"⚠️ 解析性能测试报告失败: {e}")
-                self.test_results['performance_tests'] = {'error': str(e)}
-        else:
-            self.test_results['performance_tests'] = {'message': '未找到性能测试报告'}
-    
-    def _collect_security_results(self):
-        """
-        收集安全测试结果
-        """
-        # 查找安全扫描报告
-        bandit_files = list(self.reports_dir.glob('bandit-report.json'))
-        safety_files = list(self.reports_dir.glob('safety-report.json'))
-        
-        security_results = {
-            'bandit': {},
-            'safety': {}
-        }
-        
-        # 解析Bandit报告
-        if bandit_files:
-            try:
-                with open(bandit_files[0], 'r', encoding='utf-8') as f:
-                    bandit_data = json.load(f)
-                    security_results['bandit'] = {
-                        'total_issues': len(bandit_data.get('results', [])),
-                        'high_severity': len([r for r in bandit_data.get('results', []) if r.get('issue_severity') == 'HIGH']),
-                        'medium_severity': len([r for r in bandit_data.get('results', []) if r.get('issue_severity') == 'MEDIUM']),
-                        'low_severity': len([r for r in bandit_data.get('results', []) if r.get('issue_severity') == 'LOW']),
-                        'issues': bandit_data.get('results', [])
-                    }
-            except Exception as e:
-                security_results['bandit'] = {'error': str(e)}
-        
-        # 解析Safety报告
-        if safety_files:
-            try:
-                with open(safety_files[0], 'r', encoding='utf-8') as f:
-                    safety_data = json.load(f)
-                    security_results['safety'] = {
-                        'vulnerabilities': len(safety_data),
-                        'issues': safety_data
-                    }
-            except Exception as e:
-                security_results['safety'] = {'error': str(e)}
-        
-        self.test_results['security_tests'] = security_results
-    
-    def generate_html_report(self, output_file: str = None):
-        """
-        生成HTML格式的测试报告
-        """
-        if not output_file:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = self.reports_dir / f'test_summary_{timestamp}.html'
-        
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        html_content = self._generate_html_content()
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print(f"📄 HTML报告已生成: {output_path}")
-        return output_path
-    
-    def _generate_html_content(self) -> str:
-        """
-        生成HTML内容
-        """
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        html = f"""
+    __slots__ = ('test', 'type', 'message', 'details')
+    test: Optional[str]
+    type: str
+    message: str
+    details: str
+
+
+def _json_default(obj: Any) -> Any:
+    """
+    标准库json无法直接序列化的对象转换
+    """
+    if isinstance(obj, TestError):
+        return asdict(obj)
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def _read_json(path: Path) -> Any:
+    """
+    读取JSON文件，优先使用orjson直接解析字节内容
+    """
+    if orjson:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 报告中展示的测试类型及名称，按展示顺序排列
+_TEST_TYPES = (
+    ('unit_tests', '单元测试'),
+    ('api_tests', 'API测试'),
+    ('ui_tests', 'UI测试'),
+    ('performance_tests', '性能测试'),
+    ('security_tests', '安全测试'),
+)
+
+# HTML报告模板，模块加载时构建一次，生成报告时只需format填充
+_HTML_HEADER = """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -352,18 +218,11 @@ class TestReportGenerator:
         
         <div class="summary">
 """
-        
-        # 计算总体统计
-        total_tests = sum(result.get('total', 0) for result in self.test_results.values() if isinstance(result, dict) and 'total' in result)
-        total_passed = sum(result.get('passed', 0) for result in self.test_results.values() if isinstance(result, dict) and 'passed' in result)
-        total_failed = sum(result.get('failed', 0) for result in self.test_results.values() if isinstance(result, dict) and 'failed' in result)
-        overall_success_rate = (total_passed / total_tests * 100) if total_tests > 0 else 0
-        
-        # 添加汇总卡片
-        html += f"""
-            <div class="summary-card {'success' if overall_success_rate >= 90 else 'warning' if overall_success_rate >= 70 else 'danger'}">
+
+_HTML_SUMMARY = """
+            <div class="summary-card {card_class}">
                 <h3>总体成功率</h3>
-                <div class="number">{overall_success_rate:.1f}%</div>
+                <div class="number">{success_rate:.1f}%</div>
                 <p>{total_passed}/{total_tests} 测试通过</p>
             </div>
             
@@ -388,53 +247,34 @@ class TestReportGenerator:
         
         <div class="details">
 """
-        
-        # 添加各类测试的详细信息
-        test_types = {
-            'unit_tests': '单元测试',
-            'api_tests': 'API测试',
-            'ui_tests': 'UI测试',
-            'performance_tests': '性能测试',
-            'security_tests': '安全测试'
-        }
-        
-        for test_type, test_name in test_types.items():
-            result = self.test_results.get(test_type, {})
-            html += self._generate_test_section_html(test_name, result)
-        
-        html += """
+
+_HTML_FOOTER = """
         </div>
     </div>
 </body>
 </html>
 """
-        
-        return html
-    
-    def _generate_test_section_html(self, test_name: str, result: Dict[str, Any]) -> str:
-        """
-        生成测试部分的HTML
-        """
-        if not result or 'error' in result:
-            return f"""
+
+_SECTION_MISSING = """
             <div class="test-section">
                 <div class="test-section-header">{test_name}</div>
                 <div class="test-section-content">
                     <p>❌ 未找到测试结果或解析失败</p>
-                    {f'<p>错误: {result.get("error", "未知错误")}</p>' if 'error' in result else ''}
+                    {error_html}
                 </div>
             </div>
 """
-        
-        if 'total' in result:
-            # 标准测试结果
-            total = result.get('total', 0)
-            passed = result.get('passed', 0)
-            failed = result.get('failed', 0)
-            success_rate = result.get('success_rate', 0)
-            errors = result.get('errors', [])
-            
-            html = f"""
+
+_SECTION_EMPTY = """
+            <div class="test-section">
+                <div class="test-section-header">{test_name}</div>
+                <div class="test-section-content">
+                    <p>无测试执行</p>
+                </div>
+            </div>
+"""
+
+_SECTION_RESULT = """
             <div class="test-section">
                 <div class="test-section-header">{test_name}</div>
                 <div class="test-section-content">
@@ -446,39 +286,359 @@ class TestReportGenerator:
                         <div class="progress-fill" style="width: {success_rate}%"></div>
                     </div>
 """
-            
-            if errors:
-                html += """
+
+_SECTION_ERROR_LIST = """
                     <h4>失败详情:</h4>
                     <div class="error-list">
 """
-                for error in errors[:10]:  # 只显示前10个错误
-                    html += f"""
+
+_SECTION_ERROR_ITEM = """
                         <div class="error-item">
-                            <div class="error-title">{error.get('test', '未知测试')}</div>
-                            <div class="error-message">{error.get('message', '无错误信息')}</div>
+                            <div class="error-title">{test}</div>
+                            <div class="error-message">{message}</div>
                         </div>
 """
-                if len(errors) > 10:
-                    html += f"<p>... 还有 {len(errors) - 10} 个错误</p>"
-                html += "</div>"
-            
-            html += """
+
+_SECTION_END = """
                 </div>
             </div>
 """
-            
-            return html
-        else:
-            # 特殊格式的结果（如性能测试）
-            return f"""
+
+_SECTION_RAW = """
             <div class="test-section">
                 <div class="test-section-header">{test_name}</div>
                 <div class="test-section-content">
-                    <pre>{json.dumps(result, indent=2, ensure_ascii=False)}</pre>
+                    <pre>{content}</pre>
                 </div>
             </div>
 """
+
+
+class TestReportGenerator:
+    """
+    测试报告生成器
+    """
+    
+    def __init__(self, base_dir: str = None):
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.reports_dir = self.base_dir / 'reports'
+        self.test_results = {
+            'unit_tests': {},
+            'api_tests': {},
+            'ui_tests': {},
+            'performance_tests': {},
+            'security_tests': {}
+        }
+        # 总体统计缓存，HTML和JSON报告共用，重新收集结果时失效
+        self._summary = None
+        # 报告目录文件索引（按扩展名分组），每次收集时只遍历一次目录
+        self._reports_index = None
+    
+    def collect_test_results(self):
+        """
+        收集所有测试结果
+        """
+        print("📊 收集测试结果...")
+        self._summary = None
+        # 在并行收集前建立报告目录索引，各收集方法只读索引
+        self._reports_index = self._scan_reports_dir()
+        
+        # 收集单元测试结果
+        # 注意：当前API测试目录为空，暂时跳过
+        # self._collect_pytest_results('unit_tests', 'tests/automation/api')
+        
+        # API测试结果 - 目录为空，暂时跳过
+        # self._collect_pytest_results('api_tests', 'tests/automation/api')
+        
+        # 各类结果相互独立，主要耗时在文件读取和解析，并行收集；
+        # 每个任务只写入自己的结果键。性能测试结果以性能汇总报告为准，
+        # 不再先解析tests/performance下的JUnit报告再被覆盖
+        collectors = [
+            # 使用实际存在的测试目录
+            lambda: self._collect_pytest_results('ui_tests', 'tests/ui'),
+            lambda: self._collect_pytest_results('database_tests', 'tests/database'),
+            # 收集性能测试结果
+            self._collect_performance_results,
+            # 收集安全测试结果
+            self._collect_security_results,
+        ]
+        with ThreadPoolExecutor(max_workers=len(collectors)) as executor:
+            for future in [executor.submit(collector) for collector in collectors]:
+                future.result()
+    
+    def _scan_reports_dir(self) -> Dict[str, List[Path]]:
+        """
+        遍历一次报告目录，按扩展名分组记录其中的文件
+        """
+        index = defaultdict(list)
+        try:
+            with os.scandir(self.reports_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        index[os.path.splitext(entry.name)[1]].append(Path(entry.path))
+        except OSError:
+            pass
+        return index
+    
+    def _report_files(self, suffix: str) -> List[Path]:
+        """
+        返回报告目录中指定扩展名的文件，未建立索引时先遍历目录
+        """
+        if self._reports_index is None:
+            self._reports_index = self._scan_reports_dir()
+        return self._reports_index.get(suffix, [])
+    
+    def _collect_pytest_results(self, test_type: str, test_dir: str):
+        """
+        收集pytest测试结果
+        """
+        # 查找JUnit XML报告
+        junit_files = [path for path in self._report_files('.xml') if test_type in path.name]
+        if not junit_files:
+            junit_files = list(Path(test_dir).glob('**/junit*.xml'))
+        
+        total_tests = 0
+        passed_tests = 0
+        failed_tests = 0
+        skipped_tests = 0
+        errors = []
+        
+        for junit_file in junit_files:
+            try:
+                # 流式解析：每个元素结束时处理并立即释放，不在内存中保留整棵树
+                for _, elem in ET.iterparse(str(junit_file), events=('end',)):
+                    if elem.tag == 'testcase':
+                        # 收集错误信息
+                        failure = elem.find('failure')
+                        error = elem.find('error')
+                        if failure is not None:
+                            errors.append(TestError(elem.get('name'), 'failure', failure.get('message', ''), failure.text or ''))
+                        elif error is not None:
+                            errors.append(TestError(elem.get('name'), 'error', error.get('message', ''), error.text or ''))
+                        self._release_element(elem)
+                    elif elem.tag == 'testsuite':
+                        # 解析测试套件，每个属性只读取和转换一次
+                        attrs = elem.attrib
+                        tests = int(attrs.get('tests', 0))
+                        failures = int(attrs.get('failures', 0))
+                        suite_errors = int(attrs.get('errors', 0))
+                        skipped = int(attrs.get('skipped', 0))
+                        total_tests += tests
+                        passed_tests += tests - failures - suite_errors - skipped
+                        failed_tests += failures
+                        skipped_tests += skipped
+                        self._release_element(elem)
+            except Exception as e:
+                print(f"⚠️ 解析 {junit_file} 失败: {e}")
+        
+        self.test_results[test_type] = {
+            'total': total_tests,
+            'passed': passed_tests,
+            'failed': failed_tests,
+            'skipped': skipped_tests,
+            'success_rate': (passed_tests / total_tests * 100) if total_tests > 0 else 0,
+            'errors': errors
+        }
+    
+    @staticmethod
+    def _release_element(elem):
+        """
+        释放已处理的XML元素
+        lxml下同时删除已处理的前序兄弟节点，标准库的元素没有父节点引用，只清空自身
+        """
+        elem.clear()
+        if hasattr(elem, 'getprevious'):
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    
+    def _collect_performance_results(self):
+        """
+        收集性能测试结果
+        """
+        perf_dir = self.base_dir / 'tests' / 'performance' / 'reports'
+        
+        # 查找最新的性能测试报告：一次遍历目录，直接使用目录项的stat结果
+        latest_file = None
+        latest_mtime = None
+        try:
+            with os.scandir(perf_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith('performance_summary_') and entry.name.endswith('.json'):
+                        mtime = entry.stat().st_mtime
+                        if latest_mtime is None or mtime > latest_mtime:
+                            latest_file, latest_mtime = entry.path, mtime
+        except OSError:
+            pass
+        
+        if latest_file:
+            try:
+                self.test_results['performance_tests'] = _read_json(latest_file)
+            except Exception as e:
+                print(f"⚠️ 解析性能测试报告失败: {e}")
+                self.test_results['performance_tests'] = {'error': str(e)}
+        else:
+            self.test_results['performance_tests'] = {'message': '未找到性能测试报告'}
+    
+    def _collect_security_results(self):
+        """
+        收集安全测试结果
+        """
+        # 查找安全扫描报告
+        json_files = self._report_files('.json')
+        bandit_files = [path for path in json_files if path.name == 'bandit-report.json']
+        safety_files = [path for path in json_files if path.name == 'safety-report.json']
+        
+        security_results = {
+            'bandit': {},
+            'safety': {}
+        }
+        
+        # 解析Bandit报告
+        if bandit_files:
+            try:
+                bandit_data = _read_json(bandit_files[0])
+                issues = bandit_data.get('results', [])
+                # 一次遍历统计各严重级别的问题数
+                severity_counts = Counter(r.get('issue_severity') for r in issues)
+                security_results['bandit'] = {
+                    'total_issues': len(issues),
+                    'high_severity': severity_counts['HIGH'],
+                    'medium_severity': severity_counts['MEDIUM'],
+                    'low_severity': severity_counts['LOW'],
+                    'issues': issues
+                }
+            except Exception as e:
+                security_results['bandit'] = {'error': str(e)}
+        
+        # 解析Safety报告
+        if safety_files:
+            try:
+                safety_data = _read_json(safety_files[0])
+                security_results['safety'] = {
+                    'vulnerabilities': len(safety_data),
+                    'issues': safety_data
+                }
+            except Exception as e:
+                security_results['safety'] = {'error': str(e)}
+        
+        self.test_results['security_tests'] = security_results
+    
+    def generate_html_report(self, output_file: str = None):
+        """
+        生成HTML格式的测试报告
+        """
+        if not output_file:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            output_file = self.reports_dir / f'test_summary_{timestamp}.html'
+        
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        html_content = self._generate_html_content()
+        
+        # 整体编码一次后以二进制写入，跳过文本层的分块编码
+        output_path.write_bytes(html_content.encode('utf-8'))
+        
+        print(f"📄 HTML报告已生成: {output_path}")
+        return output_path
+    
+    def _summary_stats(self) -> Dict[str, Any]:
+        """
+        总体统计：一次遍历汇总所有测试类型的总数、通过数和失败数，并计算成功率
+        结果缓存在实例上，同时生成HTML和JSON报告时只计算一次
+        """
+        if self._summary is None:
+            total_tests = total_passed = total_failed = 0
+            for result in self.test_results.values():
+                if isinstance(result, dict):
+                    total_tests += result.get('total', 0)
+                    total_passed += result.get('passed', 0)
+                    total_failed += result.get('failed', 0)
+            self._summary = {
+                'total_tests': total_tests,
+                'total_passed': total_passed,
+                'total_failed': total_failed,
+                'success_rate': (total_passed / total_tests * 100) if total_tests > 0 else 0
+            }
+        return self._summary
+    
+    def _generate_html_content(self) -> str:
+        """
+        生成HTML内容
+        """
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        # 各部分追加到列表后一次拼接，避免字符串反复扩容复制
+        parts = [_HTML_HEADER.format(timestamp=timestamp)]
+        
+        # 总体统计
+        summary = self._summary_stats()
+        overall_success_rate = summary['success_rate']
+        
+        # 添加汇总卡片
+        parts.append(_HTML_SUMMARY.format(
+            card_class='success' if overall_success_rate >= 90 else 'warning' if overall_success_rate >= 70 else 'danger',
+            success_rate=overall_success_rate,
+            total_passed=summary['total_passed'],
+            total_failed=summary['total_failed'],
+            total_tests=summary['total_tests']
+        ))
+        
+        # 添加各类测试的详细信息（这些结果键在__init__中都已初始化）
+        test_results = self.test_results
+        generate_section = self._generate_test_section_html
+        for test_type, test_name in _TEST_TYPES:
+            parts.append(generate_section(test_name, test_results[test_type]))
+        
+        parts.append(_HTML_FOOTER)
+        
+        return ''.join(parts)
+    
+    def _generate_test_section_html(self, test_name: str, result: Dict[str, Any]) -> str:
+        """
+        生成测试部分的HTML
+        """
+        if not result or 'error' in result:
+            error_html = f'<p>错误: {result.get("error", "未知错误")}</p>' if 'error' in result else ''
+            return _SECTION_MISSING.format(test_name=test_name, error_html=error_html)
+        
+        if 'total' in result:
+            # 没有执行任何测试时不输出统计和进度条
+            if result['total'] == 0:
+                return _SECTION_EMPTY.format(test_name=test_name)
+            
+            # 标准测试结果
+            errors = result.get('errors', [])
+            parts = [_SECTION_RESULT.format(
+                test_name=test_name,
+                total=result.get('total', 0),
+                passed=result.get('passed', 0),
+                failed=result.get('failed', 0),
+                success_rate=result.get('success_rate', 0)
+            )]
+            
+            if errors:
+                parts.append(_SECTION_ERROR_LIST)
+                parts.extend(
+                    _SECTION_ERROR_ITEM.format(
+                        test=error.test,
+                        message=error.message
+                    )
+                    for error in errors[:10]  # 只显示前10个错误
+                )
+                if len(errors) > 10:
+                    parts.append(f"<p>... 还有 {len(errors) - 10} 个错误</p>")
+                parts.append("</div>")
+            
+            parts.append(_SECTION_END)
+            
+            return ''.join(parts)
+        else:
+            # 特殊格式的结果（如性能测试）
+            return _SECTION_RAW.format(
+                test_name=test_name,
+                content=json.dumps(result, indent=2, ensure_ascii=False)
+            )
     
     def generate_json_report(self, output_file: str = None):
         """
@@ -493,22 +653,15 @@ class TestReportGenerator:
         
         report_data = {
             'timestamp': datetime.now().isoformat(),
-            'summary': {
-                'total_tests': sum(result.get('total', 0) for result in self.test_results.values() if isinstance(result, dict) and 'total' in result),
-                'total_passed': sum(result.get('passed', 0) for result in self.test_results.values() if isinstance(result, dict) and 'passed' in result),
-                'total_failed': sum(result.get('failed', 0) for result in self.test_results.values() if isinstance(result, dict) and 'failed' in result),
-            },
+            'summary': dict(self._summary_stats()),
             'details': self.test_results
         }
         
-        # 计算总体成功率
-        if report_data['summary']['total_tests'] > 0:
-            report_data['summary']['success_rate'] = report_data['summary']['total_passed'] / report_data['summary']['total_tests'] * 100
+        if orjson:
+            report_bytes = orjson.dumps(report_data, option=orjson.OPT_INDENT_2)
         else:
-            report_data['summary']['success_rate'] = 0
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+            report_bytes = json.dumps(report_data, indent=2, ensure_ascii=False, default=_json_default).encode('utf-8')
+        output_path.write_bytes(report_bytes)
         
         print(f"📄 JSON报告已生成: {output_path}")
         return output_path
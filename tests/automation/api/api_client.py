@@ -6,13 +6,26 @@ API测试客户端
 
 import requests
 import json
+from functools import cached_property
 from typing import Dict, Any, Optional
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .recorded_transport import RecordReplayAdapter, mock_provider_enabled
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # 未安装orjson时使用标准库解析
+    _json_loads = json.loads
 
 
 class APIClient:
     """API测试客户端类"""
     
+    # 连接池大小，并发执行测试时复用长连接
+    POOL_SIZE = 64
+    
     def __init__(self, base_url: str = "http://localhost:5000"):
         """
         初始化API客户端
@@ -21,12 +34,45 @@ class APIClient:
             base_url: API基础URL
         """
         self.base_url = base_url
+        # 以/开头的端点只需拼接在协议和主机之后（与urljoin结果一致），不必每次完整解析URL
+        parts = urlsplit(base_url)
+        self._origin = f"{parts.scheme}://{parts.netloc}"
         self.session = requests.Session()
+        # 扩大连接池（连接用尽时新建而不是阻塞等待），网关类错误短暂重试；重试耗尽时仍返回原响应，不抛出异常
+        # 设置USE_MOCK_PROVIDER=1时改用录制/回放适配器
+        adapter_class = RecordReplayAdapter if mock_provider_enabled() else HTTPAdapter
+        adapter = adapter_class(
+            pool_connections=self.POOL_SIZE,
+            pool_maxsize=self.POOL_SIZE,
+            pool_block=False,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                status_forcelist=(502, 503, 504),
+                raise_on_status=False
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
     
+    def _url(self, endpoint: str) -> str:
+        """
+        构建完整请求URL
+        
+        Args:
+            endpoint: API端点
+            
+        Returns:
+            str: 完整URL
+        """
+        if endpoint.startswith('/') and not endpoint.startswith('//'):
+            return self._origin + endpoint
+        return urljoin(self.base_url, endpoint)
+    
     def get(self, endpoint: str, params: Optional[Dict] = None, **kwargs):
         """
         发送GET请求
@@ -39,7 +85,7 @@ class APIClient:
         Returns:
             APIResponse: 响应对象
         """
-        url = urljoin(self.base_url, endpoint)
+        url = self._url(endpoint)
         response = self.session.get(url, params=params, **kwargs)
         return APIResponse(response)
     
@@ -56,7 +102,7 @@ class APIClient:
         Returns:
             APIResponse: 响应对象
         """
-        url = urljoin(self.base_url, endpoint)
+        url = self._url(endpoint)
         if json_data is not None:
             response = self.session.post(url, json=json_data, **kwargs)
         else:
@@ -76,7 +122,7 @@ class APIClient:
         Returns:
             APIResponse: 响应对象
         """
-        url = urljoin(self.base_url, endpoint)
+        url = self._url(endpoint)
         if json_data is not None:
             response = self.session.put(url, json=json_data, **kwargs)
         else:
@@ -94,10 +140,25 @@ class APIClient:
         Returns:
             APIResponse: 响应对象
         """
-        url = urljoin(self.base_url, endpoint)
+        url = self._url(endpoint)
         response = self.session.delete(url, **kwargs)
         return APIResponse(response)
     
+    def options(self, endpoint: str, **kwargs):
+        """
+        发送OPTIONS请求
+        
+        Args:
+            endpoint: API端点
+            **kwargs: 其他请求参数
+            
+        Returns:
+            APIResponse: 响应对象
+        """
+        url = self._url(endpoint)
+        response = self.session.options(url, **kwargs)
+        return APIResponse(response)
+    
     def set_auth_token(self, token: str):
         """
         设置认证令牌
@@ -127,55 +188,13 @@ class APIClient:
         Returns:
             APIResponse: 登录响应
         """
-        # 临时移除Content-Type头部并修改Accept头部以避免Flask清空session
-        original_content_type = self.session.headers.pop('Content-Type', None)
-        original_accept = None
-        
-        if 'Accept' in self.session.headers:
-            original_accept = self.session.headers['Accept']
-            self.session.headers['Accept'] = 'text/html'
-            print(f"DEBUG: 修改Accept头部: {original_accept} -> text/html")
-        
-        print(f"DEBUG: 移除的Content-Type: {original_content_type}")
-        print(f"DEBUG: 登录前头部: {dict(self.session.headers)}")
-        
-        try:
-            url = urljoin(self.base_url, '/login')
-            print(f"DEBUG: 请求URL: {url}")
-            print(f"DEBUG: base_url: {self.base_url}")
-            print(f"DEBUG: 请求数据: {{'username': '{username}', 'password': '***'}}")
-            
-            response = self.session.post(url, data={
-                'username': username,
-                'password': password
-            }, allow_redirects=False)
-            print(f"DEBUG: 登录响应状态码: {response.status_code}")
-            print(f"DEBUG: 登录响应Set-Cookie: {response.headers.get('Set-Cookie', 'None')}")
-            print(f"DEBUG: 登录后session cookies: {dict(self.session.cookies)}")
-            print(f"DEBUG: 响应内容长度: {len(response.text)}")
-            print(f"DEBUG: 响应Content-Type: {response.headers.get('Content-Type', 'None')}")
-            
-            # 检查是否是重定向响应
-            if response.status_code == 302:
-                print(f"DEBUG: 检测到重定向，Location: {response.headers.get('Location', 'None')}")
-            elif response.status_code == 200:
-                # 如果是200但内容是HTML，说明登录失败
-                content_type = response.headers.get('Content-Type', '')
-                if 'text/html' in content_type:
-                    print(f"DEBUG: 收到HTML响应，可能登录失败")
-                    print(f"DEBUG: 响应内容前200字符: {response.text[:200]}")
-            
-            return APIResponse(response)
-        finally:
-            # 恢复Content-Type头部
-            if original_content_type:
-                self.session.headers['Content-Type'] = original_content_type
-                print(f"DEBUG: 恢复Content-Type: {original_content_type}")
-            
-            # 恢复Accept头部
-            if original_accept:
-                self.session.headers['Accept'] = original_accept
-                print(f"DEBUG: 恢复Accept头部: {original_accept}")
+        # 本次请求去掉Content-Type（由表单数据决定）并只接受HTML，以避免Flask清空session；
+        # 值为None的头部会在合并会话头部时被移除，会话本身的头部不受影响
+        response = self.session.post(self._url('/login'), data={
+            'username': username,
+            'password': password
+        }, headers={'Content-Type': None, 'Accept': 'text/html'}, allow_redirects=False)
+        return APIResponse(response)
     
     def logout(self):
         """
@@ -212,12 +231,34 @@ class APIResponse:
         self.response = response
         self.status_code = response.status_code
         self.headers = response.headers
-        self.text = response.text
-        
+    
+    @cached_property
+    def text(self) -> str:
+        """
+        响应文本，首次访问时才解码
+        """
+        return self.response.text
+    
+    @cached_property
+    def is_json(self) -> bool:
+        """
+        响应的Content-Type是否为JSON（忽略大小写和首尾空白）
+        """
+        content_type = self.headers.get('Content-Type', '')
+        return content_type.strip().lower().startswith('application/json')
+    
+    @cached_property
+    def json_data(self) -> Optional[Any]:
+        """
+        响应JSON数据，首次访问时直接从响应字节解析（优先使用orjson）；
+        非JSON响应（如HTML错误页）不解析，不是有效JSON时同样为None
+        """
+        if not self.is_json:
+            return None
         try:
-            self.json_data = response.json()
-        except (json.JSONDecodeError, ValueError):
-            self.json_data = None
+            return _json_loads(self.response.content)
+        except ValueError:
+            return None
     
     @property
     def is_success(self) -> bool:
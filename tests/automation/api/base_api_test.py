@@ -4,97 +4,35 @@ API测试基础类
 提供API测试的通用功能和设置
 """
 
-import pytest
 import time
 from typing import Dict, Any
 from .api_client import APIClient, APIResponse
-from config.test_config import TestConfig
 
 
 class BaseAPITest:
     """API测试基础类"""
     
-    @pytest.fixture(scope="class")
-    def api_client(self):
-        """
-        API客户端fixture
-        
-        Returns:
-            APIClient: API客户端实例
-        """
-        client = APIClient(TestConfig.BASE_URL)
-        yield client
-        client.close()
-    
-    @pytest.fixture(scope="function")
-    def authenticated_client(self, api_client):
-        """
-        已认证的API客户端fixture
-        
-        Args:
-            api_client: API客户端
-            
-        Returns:
-            APIClient: 已认证的API客户端
-        """
-        # 登录获取会话
-        test_user = TestConfig.TEST_USER
-        response = api_client.login(test_user['username'], test_user['password'])
-        
-        # 检查登录是否成功
-        if response.status_code not in [200, 302]:
-            pytest.fail(f"管理员登录失败，状态码: {response.status_code}")
-        
-        # Flask会自动处理session cookie，无需手动设置
-        
-        yield api_client
-        
-        # 清理：登出
-        try:
-            api_client.logout()
-        except:
-            pass
-    
-    @pytest.fixture(scope="function")
-    def admin_client(self, api_client):
-        """
-        管理员API客户端fixture
-        
-        Args:
-            api_client: API客户端
-            
-        Returns:
-            APIClient: 管理员API客户端
-        """
-        # 使用管理员账户登录
-        admin_user = TestConfig.ADMIN_USER
-        response = api_client.login(admin_user['username'], admin_user['password'])
-        
-        # 检查登录是否成功
-        if response.status_code not in [200, 302]:
-            pytest.fail(f"管理员登录失败，状态码: {response.status_code}")
-        
-        # Flask会自动处理session cookie，无需手动设置
-        
-        yield api_client
-        
-        # 清理：登出
-        try:
-            api_client.logout()
-        except:
-            pass
+    # HTTP方法到客户端请求方法的映射
+    _METHOD_DISPATCH = {
+        'GET': APIClient.get,
+        'POST': APIClient.post,
+        'PUT': APIClient.put,
+        'DELETE': APIClient.delete,
+    }
     
     def make_request_with_retry(self, client: APIClient, method: str, endpoint: str, 
-                               max_retries: int = 3, delay: float = 1.0, **kwargs) -> APIResponse:
+                               max_retries: int = 3, delay: float = 0.01, max_delay: float = 1.0,
+                               **kwargs) -> APIResponse:
         """
-        带重试机制的请求
+        带重试机制的请求（指数退避）
         
         Args:
             client: API客户端
             method: HTTP方法
             endpoint: API端点
             max_retries: 最大重试次数
-            delay: 重试延迟（秒）
+            delay: 首次重试延迟（秒），之后每次翻倍
+            max_delay: 单次重试延迟上限（秒）
             **kwargs: 其他请求参数
             
         Returns:
@@ -103,27 +41,24 @@ class BaseAPITest:
         Raises:
             Exception: 重试次数用尽后抛出最后一次异常
         """
+        # 在重试循环外解析请求方法，不支持的方法直接报错而不参与重试
+        try:
+            send = self._METHOD_DISPATCH[method.upper()]
+        except KeyError:
+            raise ValueError(f"不支持的HTTP方法: {method}") from None
+        
         last_exception = None
         
         for attempt in range(max_retries + 1):
             try:
-                if method.upper() == 'GET':
-                    response = client.get(endpoint, **kwargs)
-                elif method.upper() == 'POST':
-                    response = client.post(endpoint, **kwargs)
-                elif method.upper() == 'PUT':
-                    response = client.put(endpoint, **kwargs)
-                elif method.upper() == 'DELETE':
-                    response = client.delete(endpoint, **kwargs)
-                else:
-                    raise ValueError(f"不支持的HTTP方法: {method}")
-                
-                return APIResponse(response)
+                # 客户端方法本身已返回APIResponse
+                return send(client, endpoint, **kwargs)
                 
             except Exception as e:
                 last_exception = e
                 if attempt < max_retries:
                     time.sleep(delay)
+                    delay = min(delay * 2, max_delay)
                     continue
                 else:
                     raise last_exception
@@ -170,7 +105,10 @@ class BaseAPITest:
         """
         assert response.json_data is not None, "响应不是有效的JSON格式"
         
-        def check_schema(data, schema, path=""):
+        # 用显式栈代替递归遍历嵌套结构
+        stack = [(response.json_data, expected_schema, "")]
+        while stack:
+            data, schema, path = stack.pop()
             for key, expected_type in schema.items():
                 current_path = f"{path}.{key}" if path else key
                 
@@ -178,41 +116,47 @@ class BaseAPITest:
                 
                 actual_value = data[key]
                 
+                # 常见情况下类型完全一致，直接比较type，跳过isinstance的继承链检查
+                if type(actual_value) is expected_type:
+                    continue
                 if isinstance(expected_type, type):
                     assert isinstance(actual_value, expected_type), \
                         f"键 '{current_path}' 的类型不匹配，期望 {expected_type.__name__}，实际 {type(actual_value).__name__}"
                 elif isinstance(expected_type, dict):
                     assert isinstance(actual_value, dict), \
                         f"键 '{current_path}' 应该是字典类型"
-                    check_schema(actual_value, expected_type, current_path)
+                    stack.append((actual_value, expected_type, current_path))
                 elif isinstance(expected_type, list) and len(expected_type) > 0:
                     assert isinstance(actual_value, list), \
                         f"键 '{current_path}' 应该是列表类型"
                     if len(actual_value) > 0:
-                        check_schema(actual_value[0], expected_type[0], f"{current_path}[0]")
-        
-        check_schema(response.json_data, expected_schema)
+                        stack.append((actual_value[0], expected_type[0], f"{current_path}[0]"))
     
     def wait_for_condition(self, condition_func, timeout: float = 10.0, interval: float = 0.5) -> bool:
         """
         等待条件满足
         
+        先密集检查，再逐步拉长间隔：检查间隔从10毫秒开始翻倍，直到interval
+        
         Args:
             condition_func: 条件函数
             timeout: 超时时间（秒）
-            interval: 检查间隔（秒）
+            interval: 最大检查间隔（秒）
             
         Returns:
             bool: 条件是否在超时前满足
         """
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
+        delay = min(0.01, interval)
         
-        while time.time() - start_time < timeout:
+        while True:
             if condition_func():
                 return True
-            time.sleep(interval)
-        
-        return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, interval)
     
     def create_test_data(self, client: APIClient, data_type: str, **kwargs) -> Dict[str, Any]:
         """
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+API测试的pytest配置
+提供整个API测试会话共享的fixture
+"""
+
+import pytest
+from .api_client import APIClient
+from .recorded_transport import real_http
+from config.test_config import TestConfig
+
+
+class APICapabilities:
+    """
+    API能力探测：通过OPTIONS请求的Allow响应头判断端点支持哪些HTTP方法，结果按路径缓存
+    """
+
+    def __init__(self, client: APIClient):
+        """
+        初始化能力探测
+
+        Args:
+            client: 用于发送OPTIONS请求的API客户端
+        """
+        self._client = client
+        self._allowed = {}
+
+    def allowed_methods(self, path: str) -> frozenset:
+        """
+        获取端点允许的HTTP方法
+
+        Args:
+            path: 端点路径（使用具体的ID，如/api/users/1）
+
+        Returns:
+            frozenset: 允许的方法集合，路由不存在时为空集合
+        """
+        if path not in self._allowed:
+            allow = self._client.options(path).headers.get('Allow', '')
+            self._allowed[path] = frozenset(
+                method.strip().upper() for method in allow.split(',') if method.strip()
+            )
+        return self._allowed[path]
+
+    def supports(self, method: str, path: str) -> bool:
+        """
+        判断端点是否实现了指定的HTTP方法
+
+        Args:
+            method: HTTP方法
+            path: 端点路径
+
+        Returns:
+            bool: 是否支持
+        """
+        return method.upper() in self.allowed_methods(path)
+
+
+@pytest.fixture(autouse=True)
+def _real_http_transport(request):
+    """
+    real_http标记的测试绕过录制/回放，始终访问真实服务器（避免回放结果影响计时断言，
+    以及同一会话并发改变cookie的请求无法稳定回放）
+    """
+    if request.node.get_closest_marker('real_http') is None:
+        yield
+        return
+    with real_http():
+        yield
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """
+    API客户端fixture（会话级，所有测试模块共享同一个连接池）
+
+    Returns:
+        APIClient: API客户端实例
+    """
+    # 通过上下文管理器保证会话结束时关闭连接池
+    with APIClient(TestConfig.BASE_URL) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def _anonymous_api_client(api_client):
+    """
+    每个测试结束后清空api_client的cookie
+
+    部分认证测试直接用api_client登录，清空后后续测试中的api_client始终是未认证状态
+    """
+    yield
+    api_client.session.cookies.clear()
+
+
+def _logged_in_client(user, role):
+    """
+    创建独立会话的API客户端并登录
+
+    Args:
+        user: 用户凭据字典
+        role: 用户角色描述，用于失败信息
+
+    Yields:
+        APIClient: 已登录的API客户端
+    """
+    # 登录失败或请求异常时同样会关闭连接池
+    with APIClient(TestConfig.BASE_URL) as client:
+        response = client.login(user['username'], user['password'])
+
+        # 检查登录是否成功
+        if response.status_code not in [200, 302]:
+            pytest.fail(f"{role}登录失败，状态码: {response.status_code}")
+
+        yield client
+
+        # 清理：登出
+        try:
+            client.logout()
+        except Exception:
+            pass
+
+
+@pytest.fixture(scope="session")
+def authenticated_client():
+    """
+    已认证的API客户端fixture（会话级，整个测试会话只登录一次）
+
+    使用独立的APIClient，避免会话cookie影响未认证用例使用的api_client
+
+    Returns:
+        APIClient: 已认证的API客户端
+    """
+    yield from _logged_in_client(TestConfig.TEST_USER, '测试用户')
+
+
+@pytest.fixture(scope="session")
+def admin_client():
+    """
+    管理员API客户端fixture（会话级，整个测试会话只登录一次）
+
+    Returns:
+        APIClient: 管理员API客户端
+    """
+    yield from _logged_in_client(TestConfig.ADMIN_USER, '管理员')
+
+
+@pytest.fixture(scope="session")
+def api_capabilities(api_client):
+    """
+    API能力探测fixture（会话级，每个路径只探测一次）
+
+    Returns:
+        APICapabilities: API能力探测对象
+    """
+    return APICapabilities(api_client)
+
+
+@pytest.fixture(scope="session")
+def products_list(api_client):
+    """
+    商品列表fixture（会话级，商品列表只请求一次）
+
+    Returns:
+        list: /api/products返回的商品列表
+    """
+    response = api_client.get('/api/products')
+    response.assert_status_code(200)
+    return response.json_data
+
+
+@pytest.fixture(scope="session")
+def users_list(admin_client):
+    """
+    用户列表fixture（会话级，管理员只请求一次用户列表）
+
+    Returns:
+        list: /api/users返回的用户列表
+    """
+    response = admin_client.get('/api/users')
+    response.assert_status_code(200)
+    return response.json_data
+
+
+@pytest.fixture(scope="session")
+def sample_product(products_list):
+    """
+    示例商品fixture（会话级）
+
+    Returns:
+        dict: 商品列表中的第一个商品
+    """
+    if not products_list:
+        pytest.skip("没有可用的商品进行测试")
+    return products_list[0]
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+录制/回放HTTP传输层
+设置环境变量 USE_MOCK_PROVIDER=1 后，APIClient 会挂载 RecordReplayAdapter：
+已录制的请求直接从 tests/fixtures/api_mocks 回放，不再访问网络；
+未录制的请求照常发送到服务器，并把响应保存下来供后续运行回放
+
+录制键包含请求的Cookie，同一会话并发发送、且会改变会话cookie的请求（如并发登录）
+录制到的cookie取决于线程竞争的结果，回放时无法稳定命中，这类测试必须加real_http标记
+"""
+
+import base64
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# 录制文件目录
+MOCKS_DIR = Path(__file__).resolve().parents[2] / 'fixtures' / 'api_mocks'
+
+# 保存的是解码后的响应体，原有的编码和长度相关响应头在回放时不再适用
+_DROPPED_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding', 'connection'})
+
+
+def mock_provider_enabled() -> bool:
+    """
+    是否启用录制/回放传输层
+
+    Returns:
+        bool: 环境变量 USE_MOCK_PROVIDER 为1时启用
+    """
+    return os.getenv('USE_MOCK_PROVIDER', '0') == '1'
+
+
+def request_key(request) -> str:
+    """
+    计算请求的录制键
+
+    对方法、URL（查询参数排序后）、请求体和Cookie做SHA1，
+    回放时登录响应中的Set-Cookie与录制时一致，后续请求因此能命中相同的键
+
+    Args:
+        request: requests.PreparedRequest对象
+
+    Returns:
+        str: 十六进制的SHA1摘要
+    """
+    parts = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+
+    digest = hashlib.sha1()
+    for part in (request.method.encode('ascii'), url.encode('utf-8'), body,
+                 request.headers.get('Cookie', '').encode('utf-8')):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class _OriginalResponse:
+    """
+    模拟http.client响应对象，requests从其msg中读取Set-Cookie写入会话cookie
+    """
+
+    def __init__(self, headers):
+        self.msg = http.client.HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+
+    def isclosed(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class RecordReplayAdapter(HTTPAdapter):
+    """录制/回放HTTP适配器"""
+
+    # 为True时直接使用真实网络且不录制，供real_http标记的测试使用
+    bypass = False
+
+    def __init__(self, *args, mocks_dir: Path = MOCKS_DIR, **kwargs):
+        """
+        初始化适配器
+
+        Args:
+            mocks_dir: 录制文件目录
+            其余参数与HTTPAdapter相同
+        """
+        super().__init__(*args, **kwargs)
+        self.mocks_dir = mocks_dir
+
+    def send(self, request, **kwargs):
+        """
+        发送请求：有录制时回放，否则访问服务器并录制响应
+        """
+        if RecordReplayAdapter.bypass:
+            return super().send(request, **kwargs)
+
+        path = self.mocks_dir / f'{request_key(request)}.json'
+        try:
+            with open(path, 'rb') as f:
+                recording = json.load(f)
+        except FileNotFoundError:
+            response = super().send(request, **kwargs)
+            self._record(path, request, response)
+            return response
+        return self._replay(request, recording)
+
+    def _record(self, path: Path, request, response):
+        """
+        保存响应到录制文件（先写临时文件再原子替换，并发录制同一请求时互不干扰）
+        """
+        headers = [
+            [name, value] for name, value in response.raw.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        ]
+        recording = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': headers,
+            'body': base64.b64encode(response.content).decode('ascii'),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(recording, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def _replay(self, request, recording):
+        """
+        根据录制内容构造requests响应对象
+        """
+        headers = [tuple(header) for header in recording['headers']]
+        raw = HTTPResponse(
+            body=io.BytesIO(base64.b64decode(recording['body'])),
+            headers=headers,
+            status=recording['status'],
+            reason=recording.get('reason'),
+            preload_content=False,
+            decode_content=False,
+            original_response=_OriginalResponse(headers),
+            request_method=request.method,
+        )
+        return self.build_response(request, raw)
+
+
+@contextmanager
+def real_http():
+    """
+    在上下文中绕过录制/回放，所有请求直接访问服务器
+    """
+    previous = RecordReplayAdapter.bypass
+    RecordReplayAdapter.bypass = True
+    try:
+        yield
+    finally:
+        RecordReplayAdapter.bypass = previous
@@ -5,10 +5,15 @@
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from .base_api_test import BaseAPITest
 from .api_client import APIClient
 from config.test_config import TestConfig
 
+# 测试用户凭据在模块导入时读取一次
+TEST_USERNAME = TestConfig.TEST_USER['username']
+TEST_PASSWORD = TestConfig.TEST_USER['password']
+
 
 class TestAuthAPI(BaseAPITest):
     """认证API测试类"""
@@ -21,11 +26,8 @@ class TestAuthAPI(BaseAPITest):
         Args:
             api_client: API客户端
         """
-        # 获取测试用户凭据
-        test_user = TestConfig.TEST_USER
-        
         # 发送登录请求
-        response = api_client.login(test_user['username'], test_user['password'])
+        response = api_client.login(TEST_USERNAME, TEST_PASSWORD)
         
         # 验证响应状态码（可能是200成功或302重定向）
         assert response.status_code in [200, 302], f"有效凭据登录应返回200或302，实际返回{response.status_code}"
@@ -34,7 +36,7 @@ class TestAuthAPI(BaseAPITest):
         self.assert_response_time(response, max_time=3.0)
         
         # 如果是JSON响应，验证内容
-        if response.headers.get('Content-Type', '').startswith('application/json'):
+        if response.is_json:
             json_data = response.json_data
             if json_data is not None:
                 # 可能包含成功信息或用户信息
@@ -45,88 +47,54 @@ class TestAuthAPI(BaseAPITest):
             cookie_header = response.headers['Set-Cookie']
             assert 'session' in cookie_header.lower() or 'auth' in cookie_header.lower(), "登录应设置会话cookie"
     
-    @pytest.mark.smoke
-    def test_login_invalid_username(self, api_client: APIClient):
-        """
-        测试使用无效用户名登录
-        
-        Args:
-            api_client: API客户端
-        """
-        # 使用无效用户名
-        response = api_client.login('invalid_user', 'password123')
-        
-        # 验证响应状态码（Web应用可能返回200并显示错误消息）
-        assert response.status_code in [200, 400, 401, 302], f"无效用户名登录应返回200、400、401或302，实际返回{response.status_code}"
-        
-        # 如果是JSON响应，验证错误信息
-        if response.headers.get('Content-Type', '').startswith('application/json'):
-            json_data = response.json_data
-            if json_data is not None:
-                assert 'error' in json_data or 'message' in json_data, "登录失败应返回错误信息"
-    
-    @pytest.mark.smoke
-    def test_login_invalid_password(self, api_client: APIClient):
-        """
-        测试使用无效密码登录
+    @pytest.mark.parametrize("username,password", [
+        pytest.param('invalid_user', 'password123', marks=pytest.mark.smoke, id='invalid_username'),
+        pytest.param(TEST_USERNAME, 'wrong_password', marks=pytest.mark.smoke, id='invalid_password'),
+        pytest.param('', '', id='empty_credentials'),
+        # 值为None的表单字段不会被发送，用于模拟缺少字段的请求
+        pytest.param('testuser', None, id='missing_password'),
+        pytest.param(None, 'password123', id='missing_username'),
+        # 包含特殊字符的凭据，不应该导致服务器错误
+        pytest.param('user@domain.com', 'pass123', id='email_username'),
+        pytest.param('user with spaces', 'password', id='username_with_spaces'),
+        pytest.param('user123', 'pass@#$%', id='special_password'),
+        pytest.param('用户名', '密码123', id='chinese_credentials'),
+    ])
+    def test_login_rejects_invalid_credentials(self, api_client: APIClient, username, password):
+        """
+        测试使用无效、缺失或包含特殊字符的凭据登录
         
         Args:
             api_client: API客户端
+            username: 用户名（None表示不发送该字段）
+            password: 密码（None表示不发送该字段）
         """
-        # 获取测试用户名但使用错误密码
-        test_user = TestConfig.TEST_USER
-        response = api_client.login(test_user['username'], 'wrong_password')
+        response = api_client.login(username, password)
         
         # 验证响应状态码（Web应用可能返回200并显示错误消息）
-        assert response.status_code in [200, 400, 401, 302], f"无效密码登录应返回200、400、401或302，实际返回{response.status_code}"
+        assert response.status_code in [200, 400, 401, 302], f"无效凭据 '{username}' 登录应返回200、400、401或302，实际返回{response.status_code}"
         
         # 如果是JSON响应，验证错误信息
-        if response.headers.get('Content-Type', '').startswith('application/json'):
+        if response.is_json:
             json_data = response.json_data
             if json_data is not None:
                 assert 'error' in json_data or 'message' in json_data, "登录失败应返回错误信息"
     
-    def test_login_empty_credentials(self, api_client: APIClient):
+    def test_logout_authenticated_user(self, api_client: APIClient):
         """
-        测试使用空凭据登录
-        
-        Args:
-            api_client: API客户端
-        """
-        # 使用空用户名和密码
-        response = api_client.login('', '')
+        测试已认证用户登出
         
-        # 验证响应状态码（Web应用可能返回200并显示错误消息）
-        assert response.status_code in [200, 400, 401, 302], f"空凭据登录应返回200、400、401或302，实际返回{response.status_code}"
-    
-    def test_login_missing_fields(self, api_client: APIClient):
-        """
-        测试缺少字段的登录请求
+        会话级的authenticated_client需要保持登录状态，因此这里自行登录后再登出
         
         Args:
             api_client: API客户端
         """
-        # 发送只有用户名的登录请求
-        response = api_client.post('/login', data={'username': 'testuser'})
-        
-        # 验证响应状态码（Web应用可能返回200并显示错误消息）
-        assert response.status_code in [200, 400, 401, 302], f"缺少密码字段应返回200、400、401或302，实际返回{response.status_code}"
-        
-        # 发送只有密码的登录请求
-        response = api_client.post('/login', data={'password': 'password123'})
-        
-        # 验证响应状态码（Web应用可能返回200并显示错误消息）
-        assert response.status_code in [200, 400, 401, 302], f"缺少用户名字段应返回200、400、401或302，实际返回{response.status_code}"
-    
-    def test_logout_authenticated_user(self, authenticated_client: APIClient):
-        """
-        测试已认证用户登出
+        # 先登录
+        login_response = api_client.login(TEST_USERNAME, TEST_PASSWORD)
+        assert login_response.status_code in [200, 302], "登录应该成功"
         
-        Args:
-            authenticated_client: 已认证的API客户端
-        """
         # 发送登出请求
-        response = authenticated_client.logout()
+        response = api_client.logout()
         
         # 验证响应状态码（可能是200成功或302重定向）
         assert response.status_code in [200, 302, 405], f"登出应返回200、302或405，实际返回{response.status_code}"
@@ -135,7 +103,7 @@ class TestAuthAPI(BaseAPITest):
         self.assert_response_time(response, max_time=3.0)
         
         # 如果是JSON响应，验证内容
-        if response.headers.get('Content-Type', '').startswith('application/json'):
+        if response.is_json:
             json_data = response.json_data
             if json_data is not None:
                 assert 'success' in json_data or 'message' in json_data, "登出响应应包含相关信息"
@@ -153,6 +121,7 @@ class TestAuthAPI(BaseAPITest):
         # 验证响应状态码（可能是200、302或401）
         assert response.status_code in [200, 302, 401, 405], f"未认证用户登出应返回200、302、401或405，实际返回{response.status_code}"
     
+    @pytest.mark.serial
     def test_login_logout_flow(self, api_client: APIClient):
         """
         测试完整的登录-登出流程
@@ -160,11 +129,8 @@ class TestAuthAPI(BaseAPITest):
         Args:
             api_client: API客户端
         """
-        # 获取测试用户凭据
-        test_user = TestConfig.TEST_USER
-        
         # 步骤1：登录
-        login_response = api_client.login(test_user['username'], test_user['password'])
+        login_response = api_client.login(TEST_USERNAME, TEST_PASSWORD)
         assert login_response.status_code in [200, 302], "登录应该成功"
         
         # Flask会自动处理session cookie，无需手动设置
@@ -178,14 +144,14 @@ class TestAuthAPI(BaseAPITest):
         assert logout_response.status_code in [200, 302, 405], "登出应该成功"
         
         # 步骤4：验证已登出状态（再次尝试访问需要认证的端点）
-        # 清除会话信息
-        if 'Cookie' in api_client.session.headers:
-            del api_client.session.headers['Cookie']
+        # 清除会话cookie，底层TCP连接保持复用
+        api_client.session.cookies.clear()
         
         cart_response_after_logout = api_client.get('/api/cart')
         # 登出后可能返回401、403或200（取决于实现）
         assert cart_response_after_logout.status_code in [200, 401, 403, 302], "登出后访问购物车的响应应该合理"
     
+    @pytest.mark.serial
     def test_multiple_login_attempts(self, api_client: APIClient):
         """
         测试多次登录尝试
@@ -193,46 +159,18 @@ class TestAuthAPI(BaseAPITest):
         Args:
             api_client: API客户端
         """
-        # 获取测试用户凭据
-        test_user = TestConfig.TEST_USER
-        
-        # 进行多次登录尝试
+        # 进行多次登录尝试，两次登录之间只清除本地会话cookie，不必逐次登出
         for i in range(3):
-            response = api_client.login(test_user['username'], test_user['password'])
+            api_client.session.cookies.clear()
+            response = api_client.login(TEST_USERNAME, TEST_PASSWORD)
             assert response.status_code in [200, 302], f"第{i+1}次登录尝试应该成功"
-            
-            # 每次登录后登出
-            if 'Set-Cookie' in response.headers:
-                session_cookie = response.headers['Set-Cookie']
-                api_client.session.headers.update({'Cookie': session_cookie})
-            
-            logout_response = api_client.logout()
-            assert logout_response.status_code in [200, 302, 405], f"第{i+1}次登出应该成功"
-            
-            # 清除会话
-            if 'Cookie' in api_client.session.headers:
-                del api_client.session.headers['Cookie']
-    
-    def test_login_with_special_characters(self, api_client: APIClient):
-        """
-        测试包含特殊字符的登录凭据
-        
-        Args:
-            api_client: API客户端
-        """
-        # 测试包含特殊字符的用户名和密码
-        special_credentials = [
-            ('user@domain.com', 'pass123'),
-            ('user with spaces', 'password'),
-            ('user123', 'pass@#$%'),
-            ('用户名', '密码123'),  # 中文字符
-        ]
         
-        for username, password in special_credentials:
-            response = api_client.login(username, password)
-            # 这些都应该是无效凭据，但不应该导致服务器错误
-            assert response.status_code in [200, 302, 400, 401], f"特殊字符凭据 '{username}' 应返回合理的状态码"
+        # 最后一次登录后登出
+        logout_response = api_client.logout()
+        assert logout_response.status_code in [200, 302, 405], "登出应该成功"
     
+    @pytest.mark.timing
+    @pytest.mark.real_http
     def test_login_performance(self, api_client: APIClient):
         """
         测试登录性能
@@ -240,17 +178,16 @@ class TestAuthAPI(BaseAPITest):
         Args:
             api_client: API客户端
         """
-        # 获取测试用户凭据
-        test_user = TestConfig.TEST_USER
-        
         # 测试登录响应时间
-        response = api_client.login(test_user['username'], test_user['password'])
+        response = api_client.login(TEST_USERNAME, TEST_PASSWORD)
         assert response.status_code in [200, 302], "登录应该成功"
         
         # 验证登录响应时间
         login_time = response.response.elapsed.total_seconds()
         assert login_time < 3.0, f"登录响应时间过长: {login_time:.2f}秒"
     
+    # 并发登录的cookie取决于线程竞争，录制结果无法稳定回放
+    @pytest.mark.real_http
     def test_concurrent_login_attempts(self, api_client: APIClient):
         """
         测试并发登录尝试
@@ -258,14 +195,10 @@ class TestAuthAPI(BaseAPITest):
         Args:
             api_client: API客户端
         """
-        # 获取测试用户凭据
-        test_user = TestConfig.TEST_USER
-        
         # 同时发送多个登录请求
-        responses = []
-        for i in range(3):
-            response = api_client.login(test_user['username'], test_user['password'])
-            responses.append(response)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            responses = list(executor.map(
+                lambda _: api_client.login(TEST_USERNAME, TEST_PASSWORD), range(3)))
         
         # 验证所有响应
         for i, response in enumerate(responses):
@@ -5,6 +5,7 @@
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from .base_api_test import BaseAPITest
 from .api_client import APIClient
 
@@ -114,71 +115,40 @@ class TestCartAPI(BaseAPITest):
             for field in expected_fields:
                 assert field in item or any(f in item for f in ['id', 'name', 'price']), f"购物车商品应包含{field}或商品基本信息"
     
-    def test_add_to_cart_post_method(self, authenticated_client: APIClient):
+    @pytest.mark.parametrize("method,accepted_status", [
+        pytest.param('POST', [200, 201, 405, 404], id='add_post'),
+        pytest.param('PUT', [200, 405, 404], id='update_put'),
+        pytest.param('DELETE', [200, 204, 405, 404], id='clear_delete'),
+    ])
+    def test_cart_write_methods(self, authenticated_client: APIClient, sample_product,
+                                method: str, accepted_status):
         """
-        测试添加商品到购物车（POST方法）
+        测试购物车写操作：添加商品（POST）、更新购物车（PUT）、清空购物车（DELETE）
         
         Args:
             authenticated_client: 已认证的API客户端
+            sample_product: 可用的示例商品
+            method: HTTP方法
+            accepted_status: 可接受的状态码（405方法不允许或404表示未实现）
         """
-        # 首先获取可用商品
-        products_response = authenticated_client.get('/api/products')
-        products_response.assert_status_code(200)
-        
-        products = products_response.json_data
-        if len(products) == 0:
-            pytest.skip("没有可用的商品进行测试")
-        
-        # 尝试添加商品到购物车
-        product_id = products[0]['id']
-        cart_data = {
-            'product_id': product_id,
-            'quantity': 1
+        payloads = {
+            'POST': {'product_id': sample_product['id'], 'quantity': 1},
+            'PUT': {'items': []},
         }
+        kwargs = {'json': payloads[method]} if method in payloads else {}
+        response = getattr(authenticated_client, method.lower())('/api/cart', **kwargs)
         
-        response = authenticated_client.post('/api/cart', json=cart_data)
-        
-        # 验证响应（可能是200、201或405方法不允许）
-        assert response.status_code in [200, 201, 405, 404], f"添加到购物车应返回200、201、405或404，实际返回{response.status_code}"
+        # 验证响应状态码
+        assert response.status_code in accepted_status, f"{method} /api/cart 应返回{accepted_status}之一，实际返回{response.status_code}"
         
-        if response.status_code in [200, 201]:
-            # 如果成功，验证响应
+        if method == 'POST' and response.status_code in [200, 201]:
+            # 如果添加成功，验证响应
             json_data = response.json_data
             if json_data is not None:
                 assert 'success' in json_data or 'message' in json_data or 'cart' in json_data, "添加购物车成功应返回相关信息"
-    
-    def test_update_cart_put_method(self, authenticated_client: APIClient):
-        """
-        测试更新购物车（PUT方法）
-        
-        Args:
-            authenticated_client: 已认证的API客户端
-        """
-        # 尝试更新购物车
-        cart_data = {
-            'items': []
-        }
-        
-        response = authenticated_client.put('/api/cart', json=cart_data)
         
-        # 验证响应（可能是200、405方法不允许或404）
-        assert response.status_code in [200, 405, 404], f"更新购物车应返回200、405或404，实际返回{response.status_code}"
-    
-    def test_clear_cart_delete_method(self, authenticated_client: APIClient):
-        """
-        测试清空购物车（DELETE方法）
-        
-        Args:
-            authenticated_client: 已认证的API客户端
-        """
-        # 尝试清空购物车
-        response = authenticated_client.delete('/api/cart')
-        
-        # 验证响应（可能是200、204、405方法不允许或404）
-        assert response.status_code in [200, 204, 405, 404], f"清空购物车应返回200、204、405或404，实际返回{response.status_code}"
-        
-        if response.status_code in [200, 204]:
-            # 如果成功，验证购物车已清空
+        if method == 'DELETE' and response.status_code in [200, 204]:
+            # 如果清空成功，验证购物车已清空
             cart_response = authenticated_client.get('/api/cart')
             cart_response.assert_status_code(200)
             
@@ -191,6 +161,8 @@ class TestCartAPI(BaseAPITest):
             elif isinstance(cart_data, list):
                 assert len(cart_data) == 0, "购物车应该已清空"
     
+    @pytest.mark.timing
+    @pytest.mark.real_http
     def test_cart_api_performance(self, authenticated_client: APIClient):
         """
         测试购物车API性能
@@ -219,10 +191,8 @@ class TestCartAPI(BaseAPITest):
             authenticated_client: 已认证的API客户端
         """
         # 同时发送多个购物车请求
-        responses = []
-        for i in range(3):
-            response = authenticated_client.get('/api/cart')
-            responses.append(response)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            responses = list(executor.map(lambda _: authenticated_client.get('/api/cart'), range(3)))
         
         # 验证所有响应
         for i, response in enumerate(responses):
@@ -5,76 +5,82 @@ API健康检查测试
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from .base_api_test import BaseAPITest
-from .api_client import APIClient
+from .api_client import APIClient, APIResponse
+
+
+@pytest.fixture(scope="module")
+def health_response(api_client):
+    """
+    健康检查响应fixture（模块级，多个只读断言共享同一次请求）
+    
+    Args:
+        api_client: API客户端
+        
+    Returns:
+        APIResponse: /api/health的响应
+    """
+    return api_client.get('/api/health')
 
 
 class TestAPIHealth(BaseAPITest):
     """API健康检查测试类"""
     
     @pytest.mark.smoke
-    def test_health_endpoint(self, api_client: APIClient):
+    def test_health_endpoint(self, health_response: APIResponse):
         """
         测试健康检查端点
         
         Args:
-            api_client: API客户端
+            health_response: 健康检查响应
         """
-        # 发送健康检查请求
-        response = api_client.get('/api/health')
-        
         # 验证响应状态码
-        response.assert_status_code(200)
+        health_response.assert_status_code(200)
         
         # 验证响应时间
-        self.assert_response_time(response, max_time=3.0)
+        self.assert_response_time(health_response, max_time=3.0)
         
         # 验证响应内容
-        json_data = response.json_data
+        json_data = health_response.json_data
         assert json_data is not None, "健康检查应返回JSON响应"
         assert 'status' in json_data, "响应中应包含status字段"
         assert json_data['status'] == 'healthy', "应用状态应为healthy"
     
     @pytest.mark.smoke
-    def test_health_endpoint_response_structure(self, api_client: APIClient):
+    def test_health_endpoint_response_structure(self, health_response: APIResponse):
         """
         测试健康检查端点响应结构
         
         Args:
-            api_client: API客户端
+            health_response: 健康检查响应
         """
-        # 发送健康检查请求
-        response = api_client.get('/api/health')
-        
         # 验证响应状态码
-        response.assert_status_code(200)
+        health_response.assert_status_code(200)
         
         # 验证JSON结构
         expected_schema = {
             'status': str,
             'timestamp': str
         }
-        self.assert_json_schema(response, expected_schema)
+        self.assert_json_schema(health_response, expected_schema)
     
     @pytest.mark.smoke
-    def test_health_endpoint_headers(self, api_client: APIClient):
+    def test_health_endpoint_headers(self, health_response: APIResponse):
         """
         测试健康检查端点响应头
         
         Args:
-            api_client: API客户端
+            health_response: 健康检查响应
         """
-        # 发送健康检查请求
-        response = api_client.get('/api/health')
-        
         # 验证响应状态码
-        response.assert_status_code(200)
+        health_response.assert_status_code(200)
         
         # 验证响应头
         expected_headers = {
             'Content-Type': 'application/json'
         }
-        self.assert_response_headers(response, expected_headers)
+        self.assert_response_headers(health_response, expected_headers)
     
     def test_health_endpoint_multiple_requests(self, api_client: APIClient):
         """
@@ -83,11 +89,9 @@ class TestAPIHealth(BaseAPITest):
         Args:
             api_client: API客户端
         """
-        # 发送多个健康检查请求
-        responses = []
-        for i in range(5):
-            response = api_client.get('/api/health')
-            responses.append(response)
+        # 并发发送多个健康检查请求
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            responses = list(executor.map(lambda _: api_client.get('/api/health'), range(5)))
         
         # 验证所有响应
         for i, response in enumerate(responses):
@@ -8,6 +8,15 @@ import pytest
 from .base_api_test import BaseAPITest
 from .api_client import APIClient
 
+# 商品对象必须包含的字段及其类型
+PRODUCT_SCHEMA = {
+    'id': int,
+    'name': str,
+    'price': (int, float),
+    'description': str
+}
+PRODUCT_REQUIRED_FIELDS = frozenset(PRODUCT_SCHEMA)
+
 
 class TestProductsAPI(BaseAPITest):
     """产品API测试类"""
@@ -15,7 +24,7 @@ class TestProductsAPI(BaseAPITest):
     @pytest.mark.smoke
     def test_get_products_list(self, api_client: APIClient):
         """
-        测试获取商品列表
+        测试获取商品列表及其响应结构
         
         Args:
             api_client: API客户端
@@ -34,58 +43,24 @@ class TestProductsAPI(BaseAPITest):
         assert json_data is not None, "商品列表应返回JSON响应"
         assert isinstance(json_data, list), "商品列表应为数组格式"
         
-        # 如果有商品，验证商品结构
+        # 如果有商品，验证第一个商品的字段和类型
         if len(json_data) > 0:
             product = json_data[0]
-            required_fields = ['id', 'name', 'price', 'description']
-            for field in required_fields:
-                assert field in product, f"商品对象应包含{field}字段"
+            assert PRODUCT_REQUIRED_FIELDS <= product.keys(), f"商品对象缺少字段: {PRODUCT_REQUIRED_FIELDS - product.keys()}"
+            for field, expected_type in PRODUCT_SCHEMA.items():
+                assert isinstance(product[field], expected_type), \
+                    f"商品字段 '{field}' 的类型不匹配，实际 {type(product[field]).__name__}"
     
-    @pytest.mark.smoke
-    def test_get_products_list_structure(self, api_client: APIClient):
-        """
-        测试商品列表响应结构
-        
-        Args:
-            api_client: API客户端
-        """
-        # 发送获取商品列表请求
-        response = api_client.get('/api/products')
-        
-        # 验证响应状态码
-        response.assert_status_code(200)
-        
-        # 验证JSON结构
-        json_data = response.json_data
-        assert isinstance(json_data, list), "商品列表应为数组格式"
-        
-        # 如果有商品，验证第一个商品的结构
-        if len(json_data) > 0:
-            expected_schema = [{
-                'id': int,
-                'name': str,
-                'price': (int, float),
-                'description': str
-            }]
-            self.assert_json_schema({'products': json_data}, {'products': expected_schema})
-    
-    def test_get_product_detail_valid_id(self, api_client: APIClient):
+    def test_get_product_detail_valid_id(self, api_client: APIClient, sample_product):
         """
         测试获取有效商品详情
         
         Args:
             api_client: API客户端
+            sample_product: 商品列表中的第一个商品
         """
-        # 首先获取商品列表
-        products_response = api_client.get('/api/products')
-        products_response.assert_status_code(200)
-        
-        products = products_response.json_data
-        if len(products) == 0:
-            pytest.skip("没有可用的商品进行测试")
-        
         # 获取第一个商品的详情
-        product_id = products[0]['id']
+        product_id = sample_product['id']
         response = api_client.get(f'/api/products/{product_id}')
         
         # 验证响应状态码
@@ -100,17 +75,20 @@ class TestProductsAPI(BaseAPITest):
         assert json_data['id'] == product_id, "返回的商品ID应与请求的ID一致"
         
         # 验证必需字段
-        required_fields = ['id', 'name', 'price', 'description']
-        for field in required_fields:
-            assert field in json_data, f"商品详情应包含{field}字段"
+        assert PRODUCT_REQUIRED_FIELDS <= json_data.keys(), f"商品详情缺少字段: {PRODUCT_REQUIRED_FIELDS - json_data.keys()}"
     
-    def test_get_product_detail_invalid_id(self, api_client: APIClient):
+    def test_get_product_detail_invalid_id(self, api_client: APIClient, api_capabilities):
         """
         测试获取无效商品详情
         
         Args:
             api_client: API客户端
+            api_capabilities: API能力探测
         """
+        # 端点未实现时直接跳过，不必再发送注定失败的请求
+        if not api_capabilities.supports('GET', '/api/products/1'):
+            pytest.skip("GET /api/products/1 未实现")
+        
         # 使用不存在的商品ID
         invalid_id = 99999
         response = api_client.get(f'/api/products/{invalid_id}')
@@ -118,13 +96,18 @@ class TestProductsAPI(BaseAPITest):
         # 验证响应状态码（应该是404）
         response.assert_status_code(404)
     
-    def test_get_product_detail_invalid_format(self, api_client: APIClient):
+    def test_get_product_detail_invalid_format(self, api_client: APIClient, api_capabilities):
         """
         测试使用无效格式的商品ID
         
         Args:
             api_client: API客户端
+            api_capabilities: API能力探测
         """
+        # 端点未实现时直接跳过，不必再发送注定失败的请求
+        if not api_capabilities.supports('GET', '/api/products/1'):
+            pytest.skip("GET /api/products/1 未实现")
+        
         # 使用非数字的商品ID
         invalid_id = "abc"
         response = api_client.get(f'/api/products/{invalid_id}')
@@ -143,11 +126,8 @@ class TestProductsAPI(BaseAPITest):
         response = api_client.get('/api/products')
         response.assert_status_code(200)
         
-        # 验证响应头
-        expected_headers = {
-            'Content-Type': 'application/json'
-        }
-        self.assert_response_headers(response, expected_headers)
+        # 验证Content-Type为JSON
+        assert response.is_json, f"响应头 'Content-Type' 应为application/json，实际 '{response.headers.get('Content-Type')}'"
     
     def test_products_api_pagination(self, api_client: APIClient):
         """
@@ -181,26 +161,25 @@ class TestProductsAPI(BaseAPITest):
         json_data = response.json_data
         assert isinstance(json_data, list), "即使有搜索参数，也应返回商品列表"
     
-    def test_products_api_performance(self, api_client: APIClient):
+    @pytest.mark.real_http
+    def test_products_api_performance(self, api_client: APIClient, benchmark):
         """
-        测试商品API性能
+        测试商品API性能（由pytest-benchmark计时，预热1轮后采样5轮）
         
         Args:
             api_client: API客户端
+            benchmark: pytest-benchmark计时fixture
         """
-        # 连续发送多个请求测试性能
-        response_times = []
+        response = benchmark.pedantic(api_client.get, args=('/api/products',), rounds=5, warmup_rounds=1)
+        response.assert_status_code(200)
         
-        for i in range(5):
-            response = api_client.get('/api/products')
-            response.assert_status_code(200)
-            response_time = response.response.elapsed.total_seconds()
-            response_times.append(response_time)
+        # 基准测试被禁用（--benchmark-disable或xdist并行运行）时没有统计数据
+        if benchmark.stats is None:
+            return
+        stats = benchmark.stats.stats
         
         # 验证平均响应时间
-        avg_response_time = sum(response_times) / len(response_times)
-        assert avg_response_time < 2.0, f"平均响应时间过长: {avg_response_time:.2f}秒"
+        assert stats.mean < 2.0, f"平均响应时间过长: {stats.mean:.2f}秒"
         
         # 验证最大响应时间
-        max_response_time = max(response_times)
-        assert max_response_time < 3.0, f"最大响应时间过长: {max_response_time:.2f}秒"
\ No newline at end of file
+        assert stats.max < 3.0, f"最大响应时间过长: {stats.max:.2f}秒"
\ No newline at end of file
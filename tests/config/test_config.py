@@ -7,9 +7,22 @@
 
 import os
 import json
+import pickle
+import functools
+import hashlib
 from pathlib import Path
 from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
+
+try:
+    import msgspec
+except ImportError:  # 未安装msgspec时使用orjson或标准库json
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用标准库json
+    orjson = None
 
 
 @dataclass
@@ -225,6 +238,20 @@ class TestConfig:
             self.report = ReportConfig()
 
 
+@functools.lru_cache(maxsize=1)
+def _config_schema_tag() -> str:
+    """
+    配置数据类结构的标识（模块名加各数据类的字段名和类型）
+    写入pickle缓存的首行，数据类字段变化或以脚本方式运行（模块名为__main__）时缓存自动失效
+    """
+    digest = hashlib.sha1(TestConfig.__module__.encode('utf-8'))
+    for cls in (TestConfig, DatabaseConfig, WebConfig, SeleniumConfig, APIConfig,
+                PerformanceConfig, SecurityConfig, ReportConfig):
+        for field in fields(cls):
+            digest.update(f"{cls.__qualname__}.{field.name}:{field.type}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
 class ConfigManager:
     """
     配置管理器
@@ -232,8 +259,8 @@ class ConfigManager:
     
     def __init__(self, config_dir: str = None):
         self.config_dir = Path(config_dir) if config_dir else Path(__file__).parent
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-        self._config_cache = {}
+        # 按环境名缓存已加载的配置（每个实例独立的缓存）
+        self._cached_load = functools.lru_cache(maxsize=8)(self._load_uncached)
     
     def load_config(self, environment: str = None) -> TestConfig:
         """
@@ -242,18 +269,23 @@ class ConfigManager:
         if environment is None:
             environment = os.getenv('TEST_ENV', 'test')
         
-        # 检查缓存
-        if environment in self._config_cache:
-            return self._config_cache[environment]
-        
+        return self._cached_load(environment)
+    
+    def clear_cache(self):
+        """
+        清空已加载配置的缓存，下次load_config时重新读取配置文件和环境变量
+        """
+        self._cached_load.cache_clear()
+    
+    def _load_uncached(self, environment: str) -> TestConfig:
+        """
+        加载指定环境的配置（不经过内存缓存）
+        """
         config_file = self.config_dir / f"{environment}.json"
         
         if config_file.exists():
-            # 从文件加载配置
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-            
-            config = self._dict_to_config(config_data)
+            # 从文件加载配置（优先使用pickle缓存）
+            config = self._load_config_file(config_file)
         else:
             # 使用默认配置
             config = self._get_default_config(environment)
@@ -263,8 +295,44 @@ class ConfigManager:
         # 应用环境变量覆盖
         config = self._apply_env_overrides(config)
         
-        # 缓存配置
-        self._config_cache[environment] = config
+        return config
+    
+    def _load_config_file(self, config_file: Path) -> TestConfig:
+        """
+        读取配置文件，解析结果缓存到同目录的pickle文件
+        缓存文件首行记录配置结构标识和配置文件的修改时间、大小，三者未变化时直接反序列化缓存
+        缓存的是应用环境变量覆盖之前的配置
+        """
+        stat = config_file.stat()
+        header = f"{_config_schema_tag()}:{stat.st_mtime_ns}:{stat.st_size}\n".encode('ascii')
+        cache_file = config_file.with_suffix('.json.pkl')
+        
+        try:
+            with open(cache_file, 'rb') as f:
+                if f.readline() == header:
+                    return pickle.load(f)
+        except Exception:
+            # 缓存损坏或无法反序列化（如引用了不存在的类）时按未命中处理，重新解析配置文件
+            pass
+        
+        if msgspec:
+            # 按数据类的字段类型直接解码，同时完成类型校验
+            config = msgspec.json.decode(config_file.read_bytes(), type=TestConfig)
+        elif orjson:
+            config = self._dict_to_config(orjson.loads(config_file.read_bytes()))
+        else:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = self._dict_to_config(json.load(f))
+        
+        # 先写临时文件再原子替换，并发的xdist进程不会读到写了一半的缓存
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(header)
+                pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
         
         return config
     
@@ -275,11 +343,16 @@ class ConfigManager:
         if environment is None:
             environment = config.environment
         
+        self.config_dir.mkdir(parents=True, exist_ok=True)
         config_file = self.config_dir / f"{environment}.json"
-        config_dict = self._config_to_dict(config)
         
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config_dict, f, indent=2, ensure_ascii=False)
+        if msgspec:
+            config_file.write_bytes(msgspec.json.format(msgspec.json.encode(config), indent=2))
+        elif orjson:
+            config_file.write_bytes(orjson.dumps(self._config_to_dict(config), option=orjson.OPT_INDENT_2))
+        else:
+            with open(config_file, 'w', encoding='utf-8') as f:
+                json.dump(self._config_to_dict(config), f, indent=2, ensure_ascii=False)
         
         print(f"配置已保存到: {config_file}")
     
@@ -487,27 +560,31 @@ class ConfigManager:
         print(f"示例配置文件已创建在: {self.config_dir}")
 
 
-# 全局配置管理器实例
-config_manager = ConfigManager()
+@functools.lru_cache(maxsize=1)
+def _default_manager() -> ConfigManager:
+    """
+    全局配置管理器实例（首次使用时创建，导入模块时不做任何文件系统操作）
+    """
+    return ConfigManager()
 
 
 def get_config(environment: str = None) -> TestConfig:
     """
     获取配置的便捷函数
     """
-    return config_manager.load_config(environment)
+    return _default_manager().load_config(environment)
 
 
 def get_database_url(environment: str = None) -> str:
     """
     获取数据库URL的便捷函数
     """
-    return config_manager.get_database_url(environment)
+    return _default_manager().get_database_url(environment)
 
 
 if __name__ == '__main__':
     # 创建示例配置文件
-    config_manager.create_sample_configs()
+    _default_manager().create_sample_configs()
     
     # 测试配置加载
     test_config = get_config('test')
@@ -55,6 +55,23 @@ def pytest_addoption(parser):
         type=int,
         help="等待超时时间（秒）"
     )
+    parser.addoption(
+        "--run-timing", 
+        action="store_true", 
+        default=False, 
+        help="运行标记为timing的计时测试（默认跳过）"
+    )
+
+def pytest_collection_modifyitems(config, items):
+    """未指定--run-timing时取消选择timing标记的测试（benchmark标记留给pytest-benchmark使用）"""
+    if config.getoption("--run-timing"):
+        return
+    selected, deselected = [], []
+    for item in items:
+        (deselected if item.get_closest_marker("timing") else selected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
 
 @pytest.fixture(scope="session")
 def browser_type(request):
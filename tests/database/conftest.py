@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+数据库测试的pytest配置
+提供SQL查询计数等数据库测试专用的fixture
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    统计代码块内通过指定引擎执行的SQL语句
+
+    Args:
+        engine: SQLAlchemy引擎
+
+    Yields:
+        list: 已执行的SQL语句列表
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def query_counter():
+    """SQL查询计数fixture，返回count_queries上下文管理器"""
+    return count_queries
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询次数测试模块
+使用内存数据库直接调用Flask应用，确保关键页面不会出现N+1查询
+
+运行方法:
+pytest tests/database/test_query_count.py -v
+"""
+
+import importlib
+import sys
+import pytest
+from pathlib import Path
+
+# 添加应用目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'app'))
+
+# 测试使用的内存数据库
+MEMORY_DATABASE_URL = 'sqlite:///:memory:'
+
+# 每个页面允许的最大查询次数
+MAX_QUERIES = 2
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    """
+    使用内存数据库导入的Flask应用模块
+
+    应用在导入时读取DATABASE_URL，环境变量只在导入期间设置，不影响后续测试和子进程
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('DATABASE_URL', MEMORY_DATABASE_URL)
+        module = importlib.import_module('app')
+    
+    if module.app.config['SQLALCHEMY_DATABASE_URI'] != MEMORY_DATABASE_URL:
+        pytest.skip("应用模块已使用其他数据库导入，无法切换到内存数据库")
+    return module
+
+
+@pytest.fixture(scope="module")
+def flask_app(app_module):
+    """
+    Flask应用fixture（测试模式，已初始化示例数据）
+    """
+    app, db = app_module.app, app_module.db
+    app.config['TESTING'] = True
+    with app.app_context():
+        app_module.init_db()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture(scope="module")
+def engine(app_module, flask_app):
+    """
+    内存数据库的SQLAlchemy引擎
+    """
+    with flask_app.app_context():
+        return app_module.db.engine
+
+
+@pytest.fixture(scope="function")
+def logged_in_client(flask_app):
+    """
+    已登录的测试客户端fixture，购物车中包含多件商品
+    """
+    client = flask_app.test_client()
+    client.post('/login', data={'username': 'testuser', 'password': 'testpassword123'})
+    for product_id in (1, 2, 3):
+        client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1})
+    return client
+
+
+@pytest.mark.database
+class TestQueryCount:
+    """
+    关键页面查询次数测试
+    """
+
+    def test_cart_page_query_count(self, engine, logged_in_client, query_counter):
+        """
+        测试购物车页面的查询次数不随商品数量增长
+        """
+        with query_counter(engine) as statements:
+            response = logged_in_client.get('/cart')
+
+        assert response.status_code == 200
+        assert len(statements) <= MAX_QUERIES, f"/cart 执行了 {len(statements)} 条SQL: {statements}"
+
+    def test_api_products_query_count(self, flask_app, engine, query_counter):
+        """
+        测试商品列表API的查询次数
+        """
+        client = flask_app.test_client()
+
+        with query_counter(engine) as statements:
+            response = client.get('/api/products')
+
+        assert response.status_code == 200
+        assert len(statements) <= MAX_QUERIES, f"/api/products 执行了 {len(statements)} 条SQL: {statements}"
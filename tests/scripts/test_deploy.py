@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+部署脚本测试
+在临时目录中执行部署管理器的命令，验证路径在shell命令中被正确转义
+
+运行方法:
+pytest tests/scripts/test_deploy.py -v
+"""
+
+import json
+import sys
+import tarfile
+import pytest
+from pathlib import Path
+
+# 添加脚本目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / 'scripts'))
+
+from deploy import DeploymentManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """
+    部署管理器fixture（所有目录名都包含空格）
+    """
+    base_dir = tmp_path / 'base dir'
+    (base_dir / 'deploy').mkdir(parents=True)
+    config = {
+        "environments": {
+            "test": {
+                "name": "测试环境",
+                "host": "localhost",
+                "port": 8080,
+                "app_dir": str(tmp_path / 'www dir' / 'myapp'),
+                "backup_dir": str(tmp_path / 'backup dir'),
+                "python_path": "python3",
+                "pre_deploy_commands": [],
+                "post_deploy_commands": []
+            }
+        },
+        "deployment": {
+            "compressor": "gzip",
+            "keep_releases": 2,
+            "backup_retention_days": 7
+        }
+    }
+    (base_dir / 'deploy' / 'config.json').write_text(json.dumps(config), encoding='utf-8')
+    return DeploymentManager(str(base_dir))
+
+
+def test_rollback_backup_name_with_space(manager, tmp_path, monkeypatch):
+    """
+    测试从文件名包含空格的备份回滚：解压到正确的发布版本目录，不会误删其他路径
+    """
+    # 备份归档包含一个顶层目录
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'app.py').write_text('print("ok")\n', encoding='utf-8')
+    backup_dir = tmp_path / 'backup dir'
+    backup_dir.mkdir()
+    backup_file = backup_dir / 'backup_test v1.tar.gz'
+    with tarfile.open(backup_file, 'w:gz') as tar:
+        tar.add(source, arcname='backup_test v1')
+
+    # 未转义时 rm -rf .../restore_backup_test v1 会删除工作目录下的v1
+    victim = manager.base_dir / 'v1'
+    victim.mkdir()
+
+    switched = []
+    monkeypatch.setattr(manager, '_stop_app', lambda env_config: None)
+    monkeypatch.setattr(manager, '_switch_release',
+                        lambda app_dir, release_dir: switched.append(release_dir) or False)
+
+    # 切换失败时rollback在重启应用之前返回
+    assert manager.rollback('test', str(backup_file)) is False
+
+    release_dir = Path(manager.envs['test'].releases_dir) / 'restore_backup_test v1'
+    assert switched == [str(release_dir)]
+    assert (release_dir / 'app.py').read_text(encoding='utf-8') == 'print("ok")\n'
+    assert victim.is_dir(), "回滚命令不应删除备份路径以外的目录"